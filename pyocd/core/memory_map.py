@@ -462,6 +462,9 @@ class MemoryMap(object):
     maintained sorted by start address.
     """
     
+    ## Maximum number of address-to-region lookups kept in the cache.
+    REGION_CACHE_SIZE = 256
+    
     def __init__(self, *more_regions):
         """! @brief Constructor.
         
@@ -472,6 +475,7 @@ class MemoryMap(object):
         @param more_regions Zero or more MemoryRegion objects passed as separate parameters.
         """
         self._regions = []
+        self._region_cache = {}
         self.add_regions(*more_regions)
 
     @property
@@ -529,6 +533,7 @@ class MemoryMap(object):
         new_region.map = self
         self._regions.append(new_region)
         self._regions.sort()
+        self._region_cache.clear()
     
     def remove_region(self, region):
         """! @brief Removes a memory region from the map.
@@ -539,6 +544,7 @@ class MemoryMap(object):
         for i, r in enumerate(self._regions):
             if r is region:
                 del self._regions[i]
+        self._region_cache.clear()
 
     def get_boot_memory(self):
         """! @brief Returns the first region marked as boot memory.
@@ -554,14 +560,28 @@ class MemoryMap(object):
     def get_region_for_address(self, address):
         """! @brief Returns the first region containing the given address.
         
+        Results are cached, since the same addresses tend to be looked up repeatedly (for instance,
+        when breakpoints are set). The cache is invalidated whenever regions are added or removed.
+        
         @param self
         @param address An integer target address.
         @return MemoryRegion or None.
         """
+        try:
+            return self._region_cache[address]
+        except KeyError:
+            pass
+        
+        result = None
         for r in self._regions:
             if r.contains_address(address):
-                return r
-        return None
+                result = r
+                break
+        
+        if len(self._region_cache) >= self.REGION_CACHE_SIZE:
+            self._region_cache.clear()
+        self._region_cache[address] = result
+        return result
 
     def is_valid_address(self, address):
         """! @brief Determines whether an address is contained by any region.
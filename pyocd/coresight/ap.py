@@ -729,8 +729,9 @@ class AHB_AP(MEM_AP):
         # come back as garbage if TRCENA is not set.
         try:
             demcr = self.read32(DEMCR)
-            self.write32(DEMCR, demcr | DEMCR_TRCENA)
-            self.dp.flush()
+            if (demcr & DEMCR_TRCENA) == 0:
+                self.write32(DEMCR, demcr | DEMCR_TRCENA)
+                self.dp.flush()
         except exceptions.TransferError:
             # Ignore exception and read whatever we can of the ROM table.
             pass
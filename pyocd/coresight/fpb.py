@@ -15,6 +15,7 @@
 # limitations under the License.
 
 from ..core.target import Target
+from ..core import exceptions
 from .component import CoreSightComponent
 from ..debug.breakpoints.provider import (Breakpoint, BreakpointProvider)
 import logging
@@ -38,11 +39,18 @@ class FPB(BreakpointProvider, CoreSightComponent):
     FP_CTRL_REV_MASK = 0xf0000000
     FP_CTRL_REV_SHIFT = 28
     FP_COMP0 = 0x00000008
+    FP_COMP_ENABLE = 1 << 0
+
+    ## Number of words read from the start of the FPB on init: FP_CTRL, FP_REMAP, and the
+    # first 8 comparators, which covers the FPBs of most v6-M, v7-M, and v8-M cores.
+    INIT_READ_COUNT = 2 + 8
     
     def __init__(self, ap, cmpid=None, addr=None):
         CoreSightComponent.__init__(self, ap, cmpid, addr)
         BreakpointProvider.__init__(self)
         self.hw_breakpoints = []
+        self._free_slots = []
+        self._bp_by_addr = {}
         self.nb_code = 0
         self.nb_lit = 0
         self.num_hw_breakpoint_used = 0
@@ -60,36 +68,68 @@ class FPB(BreakpointProvider, CoreSightComponent):
         (Flash Patch and Breakpoint Unit), which will be enabled when the first breakpoint is set.
         setup FPB (breakpoint)
         """
-        fpcr = self.ap.read32(self.address + FPB.FP_CTRL)
+        # Read FP_CTRL together with the first comparators in a single transfer, so we can tell
+        # whether any comparators have to be cleared. Fall back to reading only FP_CTRL if the
+        # reserved space past the last implemented comparator faults.
+        try:
+            regs = self.ap.read_memory_block32(self.address + FPB.FP_CTRL, FPB.INIT_READ_COUNT)
+        except exceptions.TransferFaultError:
+            regs = [self.ap.read32(self.address + FPB.FP_CTRL)]
+        fpcr = regs[0]
         self.fpb_rev = 1 + ((fpcr & FPB.FP_CTRL_REV_MASK) >> FPB.FP_CTRL_REV_SHIFT)
         if self.fpb_rev not in (1, 2):
             LOG.warning("Unknown FPB version %d", self.fpb_rev)
         self.nb_code = ((fpcr >> 8) & 0x70) | ((fpcr >> 4) & 0xF)
         self.nb_lit = (fpcr >> 7) & 0xf
         LOG.info("%d hardware breakpoints, %d literal comparators", self.nb_code, self.nb_lit)
-        for i in range(self.nb_code):
-            self.hw_breakpoints.append(HardwareBreakpoint(self.address + FPB.FP_COMP0 + 4*i, self))
+        self.hw_breakpoints = [HardwareBreakpoint(self.address + FPB.FP_COMP0 + 4*i, self)
+                                for i in range(self.nb_code)]
+        # Free comparators are popped from the end, so reverse to hand out FP_COMP0 first.
+        self._free_slots = list(reversed(self.hw_breakpoints))
+        self._bp_by_addr = {}
+        self.num_hw_breakpoint_used = 0
 
         # disable FPB (will be enabled on first bp set)
-        self.disable()
-        for bp in self.hw_breakpoints:
-            self.ap.write_memory(bp.comp_register_addr, 0)
+        self.disable(force=True)
+
+        # The comparators are contiguous, so clear them all with one block write. The write is
+        # skipped if all comparators were read back as already disabled.
+        comps = regs[2:2 + self.nb_code]
+        if len(comps) < self.nb_code or any(comp & FPB.FP_COMP_ENABLE for comp in comps):
+            self.ap.write_memory_block32(self.address + FPB.FP_COMP0, [0] * self.nb_code)
 
     @property
     def bp_type(self):
         return Target.BreakpointType.HW
 
-    def enable(self):
+    def enable(self, force=False):
+        """! @brief Enable the FPB.
+        
+        The FP_CTRL write is skipped if the FPB is already known to be enabled.
+        
+        @param self
+        @param force Write FP_CTRL even if the cached state says the FPB is enabled. Use this
+            when the hardware state may have been lost, such as after a hardware reset.
+        """
+        if self.enabled and not force:
+            return
         self.ap.write_memory(self.address + FPB.FP_CTRL, FPB.FP_CTRL_KEY | 1)
         self.enabled = True
         LOG.debug('fpb has been enabled')
-        return
 
-    def disable(self):
+    def disable(self, force=False):
+        """! @brief Disable the FPB.
+        
+        The FP_CTRL write is skipped if the FPB is already known to be disabled.
+        
+        @param self
+        @param force Write FP_CTRL even if the cached state says the FPB is disabled.
+        """
+        if not self.enabled and not force:
+            return
         self.ap.write_memory(self.address + FPB.FP_CTRL, FPB.FP_CTRL_KEY | 0)
         self.enabled = False
         LOG.debug('fpb has been disabled')
-        return
 
     @property
     def available_breakpoints(self):
@@ -116,30 +156,29 @@ class FPB(BreakpointProvider, CoreSightComponent):
             LOG.error('No more hardware breakpoints are available, dropped breakpoint at 0x%08x', addr)
             return None
 
-        for bp in self.hw_breakpoints:
-            if not bp.enabled:
-                bp.enabled = True
-                comp = 0
-                if self.fpb_rev == 1:
-                    bp_match = (1 << 30)
-                    if addr & 0x2:
-                        bp_match = (2 << 30)
-                    comp = addr & 0x1ffffffc | bp_match | 1
-                elif self.fpb_rev == 2:
-                    comp = (addr & 0xfffffffe) | 1
-                self.ap.write32(bp.comp_register_addr, comp)
-                LOG.debug("BP: wrote 0x%08x to comp @ 0x%08x", comp, bp.comp_register_addr)
-                bp.addr = addr
-                self.num_hw_breakpoint_used += 1
-                return bp
-        return None
+        bp = self._free_slots.pop()
+        bp.enabled = True
+        comp = 0
+        if self.fpb_rev == 1:
+            bp_match = (1 << 30)
+            if addr & 0x2:
+                bp_match = (2 << 30)
+            comp = addr & 0x1ffffffc | bp_match | 1
+        elif self.fpb_rev == 2:
+            comp = (addr & 0xfffffffe) | 1
+        self.ap.write32(bp.comp_register_addr, comp)
+        LOG.debug("BP: wrote 0x%08x to comp @ 0x%08x", comp, bp.comp_register_addr)
+        bp.addr = addr
+        self._bp_by_addr[addr] = bp
+        self.num_hw_breakpoint_used += 1
+        return bp
 
     def remove_breakpoint(self, bp):
         """! @brief Remove a hardware breakpoint at a specific location in flash."""
-        for hwbp in self.hw_breakpoints:
-            if hwbp.enabled and hwbp.addr == bp.addr:
-                hwbp.enabled = False
-                self.ap.write_memory(hwbp.comp_register_addr, 0)
-                self.num_hw_breakpoint_used -= 1
-                return
-
+        hwbp = self._bp_by_addr.pop(bp.addr, None)
+        if hwbp is None:
+            return
+        hwbp.enabled = False
+        self.ap.write_memory(hwbp.comp_register_addr, 0)
+        self._free_slots.append(hwbp)
+        self.num_hw_breakpoint_used -= 1
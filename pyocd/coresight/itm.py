@@ -54,6 +54,13 @@ class ITM(CoreSightComponent):
     TCR_TRACEBUSID_MASK = (0x7f << 16)
     TCR_TRACEBUSID_SHIFT = 16
     TCR_BUSY_MASK = (1 << 23)
+
+    ## TCR value written by enable(): ITM, timestamps, and DWT forwarding enabled, trace bus ID 1.
+    TCR_ENABLE_VALUE = ((1 << TCR_TRACEBUSID_SHIFT)
+                        | TCR_ITMENA_MASK
+                        | TCR_TSENA_MASK
+                        | TCR_TXENA_MASK
+                        | (TCR_TSPRESCALE_DIV_1 << TCR_TSPRESCALE_SHIFT))
     
     LAR = 0x00000fb0
     LAR_KEY = 0xC5ACCE55
@@ -88,11 +95,7 @@ class ITM(CoreSightComponent):
         return self._is_enabled
 
     def enable(self, enabled_ports=0xffffffff):
-        self.ap.write32(self.address + ITM.TCR, ((1 << ITM.TCR_TRACEBUSID_SHIFT)
-                                    | ITM.TCR_ITMENA_MASK
-                                    | ITM.TCR_TSENA_MASK
-                                    | ITM.TCR_TXENA_MASK
-                                    | (ITM.TCR_TSPRESCALE_DIV_1 << ITM.TCR_TSPRESCALE_SHIFT)))
+        self.ap.write32(self.address + ITM.TCR, ITM.TCR_ENABLE_VALUE)
         self.ap.write32(self.address + ITM.TERn, enabled_ports)
         self.ap.write32(self.address + ITM.TPR, 0xf) # Allow unprivileged access to all 32 ports.
         self._is_enabled = True
@@ -151,11 +151,11 @@ class CoreSightComponentID(object):
         self.valid = True
 
     def _extract_id_register_value(self, regs, offset):
-        result = 0
-        for i in range(4):
-            value = regs[offset + i]
-            result |= (value & 0xff) << (i * 8)
-        return result
+        # Each ID register holds one byte of the value in its low 8 bits.
+        return (regs[offset] & 0xff) \
+                | ((regs[offset + 1] & 0xff) << 8) \
+                | ((regs[offset + 2] & 0xff) << 16) \
+                | ((regs[offset + 3] & 0xff) << 24)
 
     def __repr__(self):
         if not self.valid:
@@ -320,30 +320,39 @@ class Class1ROMTable(ROMTable):
     ROM_TABLE_MAX_ENTRIES = 960
 
     def _read_table(self):
+        for entryNumber, entry in enumerate(self._read_table_entries()):
+            try:
+                self._handle_table_entry(entry, entryNumber)
+            except exceptions.TransferError as err:
+                LOG.error("Error attempting to probe CoreSight component referenced by "
+                        "ROM table entry #%d: %s", entryNumber, err,
+                        exc_info=self.session.get_current().log_tracebacks)
+
+    def _read_table_entries(self):
+        """! @brief Read all entries of the table up to the terminating zero entry.
+        
+        The entries are read back to back with block reads before any component is probed, so
+        the table reads are not interleaved with component accesses.
+        
+        @return List of nonzero table entry values.
+        """
+        result = []
         entryAddress = self.address
-        foundEnd = False
         entriesRead = 0
-        entryNumber = 0
-        while not foundEnd and entriesRead < self.ROM_TABLE_MAX_ENTRIES:
+        while entriesRead < self.ROM_TABLE_MAX_ENTRIES:
             # Read several entries at a time for performance.
             readCount = min(self.ROM_TABLE_MAX_ENTRIES - entriesRead, self.ROM_TABLE_ENTRY_READ_COUNT)
             entries = self.ap.read_memory_block32(entryAddress, readCount)
             entriesRead += readCount
-
-            for entry in entries:
-                # Zero entry indicates the end of the table.
-                if entry == 0:
-                    foundEnd = True
-                    break
-                try:
-                    self._handle_table_entry(entry, entryNumber)
-                except exceptions.TransferError as err:
-                    LOG.error("Error attempting to probe CoreSight component referenced by "
-                            "ROM table entry #%d: %s", entryNumber, err,
-                            exc_info=self.session.get_current().log_tracebacks)
-
-                entryAddress += 4
-                entryNumber += 1
+            entryAddress += readCount * 4
+
+            # Zero entry indicates the end of the table.
+            try:
+                result += entries[:entries.index(0)]
+                break
+            except ValueError:
+                result += entries
+        return result
 
     def _power_component(self, number, powerid, entry):
         if self.gpr is None:
@@ -394,7 +403,7 @@ class Class1ROMTable(ROMTable):
             self.gpr = cmpid.factory(self.ap, cmpid, None)
             self.gpr.init()
 
-        LOG.info("%s[%d]%s", self.depth_indent, number, str(cmpid))
+        LOG.info("%s[%d]%s", self.depth_indent, number, cmpid)
 
         # Recurse into child ROM tables.
         if cmpid.is_rom_table:
@@ -15,7 +15,6 @@
 # limitations under the License.
 
 import logging
-from copy import copy
 
 from .provider import Breakpoint
 from ...core.target import Target
@@ -46,11 +45,12 @@ class BreakpointManager(object):
 
     def __init__(self, core):
         self._breakpoints = {}
-        self._updated_breakpoints = {}
+        self._updated_breakpoints = self._breakpoints
         self._session = core.session
         self._core = core
         self._fpb = None
         self._providers = {}
+        self._filter_providers = ()
         self._ignore_notifications = False
 
         # Subscribe to some notifications.
@@ -62,6 +62,9 @@ class BreakpointManager(object):
         if provider.bp_type == Target.BreakpointType.HW:
             self._fpb = provider
 
+        # Cache the providers that need to see memory reads.
+        self._filter_providers = tuple(p for p in self._providers.values() if p.do_filter_memory)
+
     def get_breakpoints(self):
         """! @brief Return a list of all breakpoint addresses."""
         return self._breakpoints.keys()
@@ -99,9 +102,19 @@ class BreakpointManager(object):
             if not self._check_added_breakpoint(bp):
                 return False
 
+        self._start_update()
         self._updated_breakpoints[addr] = bp
         return True
 
+    def _start_update(self):
+        """! @brief Make sure the updated breakpoints dict can be modified.
+        
+        After a flush, the updated and live breakpoint dicts are the same object. A copy is only
+        made when the first change is recorded, rather than on every flush.
+        """
+        if self._updated_breakpoints is self._breakpoints:
+            self._updated_breakpoints = self._breakpoints.copy()
+
     def _check_added_breakpoint(self, bp):
         """! @brief Check whether a new breakpoint is likely to actually be added when we flush.
         
@@ -126,7 +139,6 @@ class BreakpointManager(object):
             if bp.type == Target.BreakpointType.HW:
                 free_hw_bp_count += 1
         for bp in added:
-            likely_bp_type = self._select_breakpoint_type(bp, False)
             if bp.type == Target.BreakpointType.HW:
                 free_hw_bp_count -= 1
         
@@ -141,6 +153,8 @@ class BreakpointManager(object):
             addr = addr & ~1
 
             # Remove bp from dict.
+            if addr in self._updated_breakpoints:
+                self._start_update()
             del self._updated_breakpoints[addr]
         except KeyError:
             LOG.debug("Tried to remove breakpoint 0x%08x that wasn't set" % addr)
@@ -149,20 +163,10 @@ class BreakpointManager(object):
         """! @brief Compute added and removed breakpoints since last flush.
         @return Bi-tuple of (added breakpoint list, removed breakpoint list).
         """
-        added = []
-        removed = []
-
-        # Get added breakpoints.
-        for bp in self._updated_breakpoints.values():
-            if not bp.addr in self._breakpoints:
-                added.append(bp)
-
-        # Get removed breakpoints.
-        for bp in self._breakpoints.values():
-            if not bp.addr in self._updated_breakpoints:
-                removed.append(bp)
-
-        # Return the list of pages to update.
+        current = self._breakpoints
+        updated = self._updated_breakpoints
+        added = [bp for addr, bp in updated.items() if addr not in current]
+        removed = [bp for addr, bp in current.items() if addr not in updated]
         return added, removed
 
     def _select_breakpoint_type(self, bp, allow_all_hw_bps):
@@ -223,6 +227,17 @@ class BreakpointManager(object):
         return type
 
     def flush(self, is_step=False):
+        # Nothing to do if no breakpoints were added or removed since the last flush. The updated
+        # dict only stops being the live dict when a change is recorded, so this is a dirty flag.
+        if self._updated_breakpoints is self._breakpoints:
+            return
+        
+        # Changes that cancelled each other out, such as setting and then removing a breakpoint,
+        # leave equal dicts. Share the live dict again so later flushes take the check above.
+        if self._updated_breakpoints == self._breakpoints:
+            self._updated_breakpoints = self._breakpoints
+            return
+
         try:
             # Ignore any notifications while we modify breakpoints.
             self._ignore_notifications = True
@@ -231,35 +246,48 @@ class BreakpointManager(object):
             LOG.debug("added=%s removed=%s", added, removed)
 
             # Handle removed breakpoints first by asking the providers to remove them.
-            for bp in removed:
-                assert bp.provider is not None
-                bp.provider.remove_breakpoint(bp)
-                del self._breakpoints[bp.addr]
+            for provider, bps in self._group_by_provider(removed).items():
+                provider.remove_breakpoints(bps)
+                for bp in bps:
+                    del self._breakpoints[bp.addr]
 
             # Only allow use of all hardware breakpoints if we're not stepping and there is
             # only a single added breakpoint.
             allow_all_hw_bps = not is_step and len(added) == 1
 
-            # Now handle added breakpoints.
+            # Now handle added breakpoints. Hardware breakpoints are set immediately, since the
+            # type selected for the following breakpoints depends on how many comparators are
+            # left. Other breakpoints are collected by type and set together so the provider can
+            # combine the target accesses.
+            addrs_by_type = {}
             for bp in added:
                 type = self._select_breakpoint_type(bp, allow_all_hw_bps)
                 if type is None:
                     continue
 
-                # Set the bp.
-                try:
-                    provider = self._providers[type]
-                    bp = provider.set_breakpoint(bp.addr)
-                except KeyError:
+                if type not in self._providers:
                     raise ValueError("Unknown breakpoint type %s" % type.name)
 
+                if type != Target.BreakpointType.HW:
+                    addrs_by_type.setdefault(type, []).append(bp.addr)
+                    continue
+
+                # Set the bp.
+                bp = self._providers[type].set_breakpoint(bp.addr)
+
                 # Save the bp.
                 if bp is not None:
                     self._breakpoints[bp.addr] = bp
 
+            # Set all other new breakpoints.
+            for type, addrs in addrs_by_type.items():
+                for bp in self._providers[type].set_breakpoints(addrs):
+                    if bp is not None:
+                        self._breakpoints[bp.addr] = bp
+
             # Update breakpoint lists.
             LOG.debug("bps after flush=%s", self._breakpoints)
-            self._updated_breakpoints = copy(self._breakpoints)
+            self._updated_breakpoints = self._breakpoints
 
             # Flush all providers.
             self._flush_all()
@@ -271,29 +299,38 @@ class BreakpointManager(object):
         return bp.type if (bp is not None) else None
 
     def filter_memory(self, addr, size, data):
-        for provider in [p for p in self._providers.values() if p.do_filter_memory]:
+        for provider in self._filter_providers:
             data = provider.filter_memory(addr, size, data)
         return data
 
     def filter_memory_unaligned_8(self, addr, size, data):
-        for provider in [p for p in self._providers.values() if p.do_filter_memory]:
-            for i, d in enumerate(data):
-                data[i] = provider.filter_memory(addr + i, 8, d)
+        for provider in self._filter_providers:
+            data = provider.filter_memory_block(addr, 8, data)
         return data
 
     def filter_memory_aligned_32(self, addr, size, data):
-        for provider in [p for p in self._providers.values() if p.do_filter_memory]:
-            for i, d in enumerate(data):
-                data[i] = provider.filter_memory(addr + i, 32, d)
+        for provider in self._filter_providers:
+            data = provider.filter_memory_block(addr, 32, data)
         return data
 
     def remove_all_breakpoints(self):
         """! @brief Remove all breakpoints immediately."""
-        for bp in self._breakpoints.values():
-            bp.provider.remove_breakpoint(bp)
+        for provider, bps in self._group_by_provider(self._breakpoints.values()).items():
+            provider.remove_breakpoints(bps)
         self._breakpoints = {}
         self._flush_all()
 
+    @staticmethod
+    def _group_by_provider(bps):
+        """! @brief Group breakpoints by the provider that owns them.
+        @return Dict mapping provider to a list of its breakpoints, in the original order.
+        """
+        groups = {}
+        for bp in bps:
+            assert bp.provider is not None
+            groups.setdefault(bp.provider, []).append(bp)
+        return groups
+
     def _flush_all(self):
         # Flush all providers.
         for provider in self._providers.values():
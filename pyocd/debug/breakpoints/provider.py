@@ -25,20 +25,21 @@ class Breakpoint(object):
         self.provider = provider
 
     def __repr__(self):
-        return "<%s@0x%08x type=%d addr=0x%08x>" % (self.__class__.__name__, id(self), self.type, self.addr)
+        return "<%s@0x%08x type=%s addr=0x%08x>" % (self.__class__.__name__, id(self), self.type.name, self.addr)
 
 class BreakpointProvider(object):
     """! @brief Abstract base class for breakpoint providers."""
+
+    ## Whether memory reads must be passed through filter_memory(). This is a plain class
+    # attribute rather than a property because it is checked on every memory read.
+    do_filter_memory = False
+
     def init(self):
         raise NotImplementedError()
 
     def bp_type(self):
         return 0
 
-    @property
-    def do_filter_memory(self):
-        return False
-
     @property
     def available_breakpoints(self):
         raise NotImplementedError()
@@ -52,9 +53,49 @@ class BreakpointProvider(object):
     def remove_breakpoint(self, bp):
         raise NotImplementedError()
 
+    def set_breakpoints(self, addrs):
+        """! @brief Set several breakpoints at once.
+        
+        The default implementation calls set_breakpoint() for each address. Providers can override
+        this to combine the target accesses.
+        
+        @param self
+        @param addrs List of breakpoint addresses.
+        @return List of breakpoint objects in the same order as _addrs_. An entry is None if the
+            corresponding breakpoint could not be set.
+        """
+        return [self.set_breakpoint(addr) for addr in addrs]
+
+    def remove_breakpoints(self, bps):
+        """! @brief Remove several breakpoints at once.
+        
+        The default implementation calls remove_breakpoint() for each breakpoint.
+        
+        @param self
+        @param bps List of breakpoint objects previously returned by this provider.
+        """
+        for bp in bps:
+            self.remove_breakpoint(bp)
+
     def filter_memory(self, addr, size, data):
         return data
 
+    def filter_memory_block(self, addr, size, data):
+        """! @brief Filter a block of memory read from the target.
+        
+        The default implementation calls filter_memory() for each element. Providers can override
+        this to only touch the elements that actually need to be changed.
+        
+        @param self
+        @param addr Address of the first element.
+        @param size Element size in bits.
+        @param data List of element values. It is modified in place and returned.
+        """
+        step = size // 8
+        for i, d in enumerate(data):
+            data[i] = self.filter_memory(addr + i * step, size, d)
+        return data
+
     def flush(self):
         pass
 
@@ -17,6 +17,7 @@
 from .provider import (Breakpoint, BreakpointProvider)
 from ...core import exceptions
 from ...core.target import Target
+from bisect import (bisect_left, insort)
 import logging
 
 LOG = logging.getLogger(__name__)
@@ -30,10 +31,14 @@ class SoftwareBreakpointProvider(BreakpointProvider):
     ## BKPT #0 instruction.
     BKPT_INSTR = 0xbe00
 
+    do_filter_memory = True
+
     def __init__(self, core):
         super(SoftwareBreakpointProvider, self).__init__()
         self._core = core
         self._breakpoints = {}
+        # Sorted breakpoint addresses, used to find the breakpoints within a memory range.
+        self._sorted_addrs = []
 
     def init(self):
         pass
@@ -42,10 +47,6 @@ class SoftwareBreakpointProvider(BreakpointProvider):
     def bp_type(self):
         return Target.BreakpointType.SW
 
-    @property
-    def do_filter_memory(self):
-        return True
-
     @property
     def available_breakpoints(self):
         return -1
@@ -71,12 +72,58 @@ class SoftwareBreakpointProvider(BreakpointProvider):
             bp.original_instr = instr
 
             # Save this breakpoint.
-            self._breakpoints[addr] = bp
+            self._save_breakpoint(bp)
             return bp
         except exceptions.TransferError:
             LOG.debug("Failed to set sw bp at 0x%x" % addr)
             return None
 
+    def set_breakpoints(self, addrs):
+        """! @brief Set several software breakpoints at once.
+        
+        The reads of the original instructions are all queued before any result is examined, so
+        the accesses can be pipelined by the debug probe instead of costing a round trip each.
+        
+        @param self
+        @param addrs List of breakpoint addresses.
+        @return List of breakpoint objects in the same order as _addrs_. An entry is None if the
+            corresponding breakpoint could not be set.
+        """
+        for addr in addrs:
+            assert self._core.memory_map.get_region_for_address(addr).is_ram
+            assert (addr & 1) == 0
+
+        try:
+            # Queue reads of all original instructions, then collect the results.
+            instr_cbs = [self._core.read16(addr, now=False) for addr in addrs]
+            instrs = [cb() for cb in instr_cbs]
+        except exceptions.TransferError:
+            # Fall back to setting each breakpoint individually so that a single bad address
+            # doesn't prevent the others from being set.
+            LOG.debug("Failed to read instructions for sw bps; setting individually")
+            return [self.set_breakpoint(addr) for addr in addrs]
+
+        result = []
+        for addr, instr in zip(addrs, instrs):
+            try:
+                # Insert BKPT #0 instruction.
+                self._core.write16(addr, self.BKPT_INSTR)
+            except exceptions.TransferError:
+                LOG.debug("Failed to set sw bp at 0x%x" % addr)
+                result.append(None)
+                continue
+
+            # Create bp object.
+            bp = SoftwareBreakpoint(self)
+            bp.enabled = True
+            bp.addr = addr
+            bp.original_instr = instr
+
+            # Save this breakpoint.
+            self._save_breakpoint(bp)
+            result.append(bp)
+        return result
+
     def remove_breakpoint(self, bp):
         assert bp is not None and isinstance(bp, Breakpoint)
 
@@ -86,11 +133,24 @@ class SoftwareBreakpointProvider(BreakpointProvider):
 
             # Remove from our list.
             del self._breakpoints[bp.addr]
+            del self._sorted_addrs[bisect_left(self._sorted_addrs, bp.addr)]
         except exceptions.TransferError:
             LOG.debug("Failed to remove sw bp at 0x%x" % bp.addr)
 
+    def _save_breakpoint(self, bp):
+        if bp.addr not in self._breakpoints:
+            insort(self._sorted_addrs, bp.addr)
+        self._breakpoints[bp.addr] = bp
+
+    def _breakpoints_in_range(self, start, end):
+        """! @brief Return the breakpoints whose instruction overlaps the range [start, end)."""
+        # A breakpoint instruction is 2 bytes, so one starting at start-1 also overlaps.
+        lo = bisect_left(self._sorted_addrs, start - 1)
+        hi = bisect_left(self._sorted_addrs, end)
+        return [self._breakpoints[addr] for addr in self._sorted_addrs[lo:hi]]
+
     def filter_memory(self, addr, size, data):
-        for bp in self._breakpoints.values():
+        for bp in self._breakpoints_in_range(addr, addr + size // 8):
             if size == 8:
                 if bp.addr == addr:
                     data = bp.original_instr & 0xff
@@ -107,5 +167,26 @@ class SoftwareBreakpointProvider(BreakpointProvider):
 
         return data
 
+    def filter_memory_block(self, addr, size, data):
+        if size not in (8, 32):
+            return super(SoftwareBreakpointProvider, self).filter_memory_block(addr, size, data)
+
+        end = addr + len(data) * (size // 8)
+        for bp in self._breakpoints_in_range(addr, end):
+            offset = bp.addr - addr
+            if size == 8:
+                if offset >= 0:
+                    data[offset] = bp.original_instr & 0xff
+                if offset + 1 < len(data):
+                    data[offset + 1] = bp.original_instr >> 8
+            else:
+                i = offset // 4
+                if offset & 2:
+                    data[i] = (data[i] & 0xffff) | (bp.original_instr << 16)
+                else:
+                    data[i] = (data[i] & 0xffff0000) | bp.original_instr
+
+        return data
+
 
 
@@ -16,10 +16,12 @@
 
 import sys
 import os
+import struct
 from elftools.elf.elffile import ELFFile
 from elftools.dwarf.constants import DW_LNE_set_address
-from intervaltree import IntervalTree
+from bisect import bisect_right
 from collections import namedtuple
+from heapq import (heappush, heappop)
 from itertools import islice
 import logging
 
@@ -29,6 +31,81 @@ FunctionInfo = namedtuple('FunctionInfo', 'name subprogram low_pc high_pc')
 LineInfo = namedtuple('LineInfo', 'cu filename dirname line')
 SymbolInfo = namedtuple('SymbolInfo', 'name address size type')
 
+## Symbol types that are added to the symbol index.
+_WANTED_SYM_TYPES = frozenset(('STT_FUNC', 'STT_OBJECT'))
+
+## Names of the symbol types in the low nibble of st_info that the raw symbol table parser keeps.
+_SYM_TYPES = {1: 'STT_OBJECT', 2: 'STT_FUNC'}
+
+## Elf32_Sym layout: st_name, st_value, st_size, st_info, st_other, st_shndx.
+_ELF32_SYM = struct.Struct('<IIIBBH')
+_ELF32_SYM_BE = struct.Struct('>IIIBBH')
+
+class AddressRangeIndex(object):
+    """! @brief Address lookup table built from a set of possibly overlapping ranges.
+    
+    The ranges are flattened into a sorted list of non-overlapping segments, so a lookup is a
+    single bisect. Where ranges overlap, an address resolves to the containing range with the
+    lowest start address, and then the lowest end address. Ranges with identical bounds resolve to
+    the one given first. This matches taking the first of the sorted intervals returned by an
+    interval tree query, except for that tie, where sorted intervals would compare the data.
+    """
+
+    def __init__(self, ranges=()):
+        """! @brief Constructor.
+        @param self
+        @param ranges Iterable of (start, end, data) tuples. The end address is exclusive. Empty
+            ranges are ignored.
+        """
+        self._starts = []
+        self._ends = []
+        self._data = []
+        self._last_hit = None
+        self._build(ranges)
+
+    def _build(self, ranges):
+        items = sorted((r for r in ranges if r[0] < r[1]), key=lambda r: (r[0], r[1]))
+        points = sorted(set(r[0] for r in items) | set(r[1] for r in items))
+        
+        # Sweep over the range boundaries. The heap holds (index, end) for ranges that may cover
+        # the current segment; since items are sorted, the lowest index is the owner. Ranges
+        # that have ended are discarded lazily when they reach the top of the heap.
+        active = []
+        owners = []
+        next_item = 0
+        for seg_start, seg_end in zip(points, points[1:]):
+            while next_item < len(items) and items[next_item][0] <= seg_start:
+                heappush(active, (next_item, items[next_item][1]))
+                next_item += 1
+            while active and active[0][1] <= seg_start:
+                heappop(active)
+            if not active:
+                continue
+            
+            owner = active[0][0]
+            # Extend the previous segment if it is adjacent and has the same owner.
+            if owners and owners[-1] == owner and self._ends[-1] == seg_start:
+                self._ends[-1] = seg_end
+            else:
+                self._starts.append(seg_start)
+                self._ends.append(seg_end)
+                self._data.append(items[owner][2])
+                owners.append(owner)
+
+    def __len__(self):
+        return len(self._starts)
+
+    def get(self, addr):
+        """! @brief Return the data for the range containing an address, or None."""
+        # Lookups tend to be for nearby addresses, so try the last matched segment first.
+        i = self._last_hit
+        if i is None or not (self._starts[i] <= addr < self._ends[i]):
+            i = bisect_right(self._starts, addr) - 1
+            if i < 0 or addr >= self._ends[i]:
+                return None
+            self._last_hit = i
+        return self._data[i]
+
 class ElfSymbolDecoder(object):
     def __init__(self, elf):
         assert isinstance(elf, ELFFile)
@@ -37,7 +114,7 @@ class ElfSymbolDecoder(object):
         self.symtab = self.elffile.get_section_by_name('.symtab')
         self.symcount = self.symtab.num_symbols()
         self.symbol_dict = {}
-        self.symbol_tree = None
+        self.symbol_index = None
 
         # Build indices.
         self._build_symbol_search_tree()
@@ -47,10 +124,7 @@ class ElfSymbolDecoder(object):
         return self.elffile
 
     def get_symbol_for_address(self, addr):
-        try:
-            return sorted(self.symbol_tree[addr])[0].data
-        except IndexError:
-            return None
+        return self.symbol_index.get(addr)
     
     def get_symbol_for_name(self, name):
         try:
@@ -58,31 +132,51 @@ class ElfSymbolDecoder(object):
         except KeyError:
             return None
 
+    def _iter_symbol_entries(self):
+        """! @brief Generate (name, value, size, type) tuples for each symbol in the symbol table.
+        
+        For 32-bit ELF files the symbol table entries are unpacked directly from the section data,
+        which avoids creating a pyelftools Symbol object and entry dict for every symbol. Other
+        files fall back to iter_symbols().
+        """
+        if self.elffile.elfclass != 32 or self.symtab['sh_entsize'] != _ELF32_SYM.size:
+            for symbol in self.symtab.iter_symbols():
+                yield (symbol.name, symbol.entry['st_value'], symbol.entry['st_size'],
+                        symbol.entry['st_info']['type'])
+            return
+
+        sym_struct = _ELF32_SYM if self.elffile.little_endian else _ELF32_SYM_BE
+        data = self.symtab.data()
+        strtab = self.elffile.get_section(self.symtab['sh_link']).data()
+        for offset in range(0, len(data) - sym_struct.size + 1, sym_struct.size):
+            st_name, st_value, st_size, st_info, _, _ = sym_struct.unpack_from(data, offset)
+            sym_type = _SYM_TYPES.get(st_info & 0xf)
+            if sym_type is None:
+                continue
+            name = strtab[st_name:strtab.find(b'\0', st_name)].decode('utf-8', 'replace')
+            yield (name, st_value, st_size, sym_type)
+
     def _build_symbol_search_tree(self):
-        self.symbol_tree = IntervalTree()
-        symbols = self.symtab.iter_symbols()
-        for symbol in symbols:
+        ranges = []
+        for name, sym_value, sym_size, sym_type in self._iter_symbol_entries():
             # Only look for functions and objects.
-            sym_type = symbol.entry['st_info']['type']
-            if sym_type not in ['STT_FUNC', 'STT_OBJECT']:
+            if sym_type not in _WANTED_SYM_TYPES:
                 continue
 
-            sym_value = symbol.entry['st_value']
-            sym_size = symbol.entry['st_size']
-
-            # Cannot put an empty interval into the tree, so ensure symbols have
-            # at least a size of 1.
+            # Empty ranges are not indexed, so ensure symbols have at least a size of 1.
             real_sym_size = sym_size
             if sym_size == 0:
                 sym_size = 1
 
-            syminfo = SymbolInfo(name=symbol.name, address=sym_value, size=real_sym_size, type=sym_type)
+            syminfo = SymbolInfo(name=name, address=sym_value, size=real_sym_size, type=sym_type)
 
             # Add to symbol dict.
-            self.symbol_dict[symbol.name] = syminfo
+            self.symbol_dict[name] = syminfo
             
-            # Add to symbol tree.
-            self.symbol_tree.addi(sym_value, sym_value+sym_size, syminfo)
+            # Add to symbol index.
+            ranges.append((sym_value, sym_value+sym_size, syminfo))
+
+        self.symbol_index = AddressRangeIndex(ranges)
 
     def _process_arm_type_symbols(self):
         type_symbols = self._get_arm_type_symbol_iter()
@@ -103,40 +197,61 @@ class ElfSymbolDecoder(object):
 
 
 class DwarfAddressDecoder(object):
+    """! @brief Maps addresses to functions and source lines using DWARF debug info.
+    
+    The subprogram list and the function and line indices are each built on first use. Walking
+    every line program of a large image is expensive, and many sessions never look up a line.
+    """
     def __init__(self, elf):
         assert isinstance(elf, ELFFile)
         self.elffile = elf
         self.dwarfinfo = None
 
-        self.subprograms = []
-        self.function_tree = IntervalTree()
-        self.line_tree = IntervalTree()
+        self._subprograms = None
+        self._function_index = None
+        self._line_index = None
 
         if self.elffile.has_dwarf_info():
             self.dwarfinfo = self.elffile.get_dwarf_info()
 
-            # Build indices.
-            self._get_subprograms()
-            self._build_function_search_tree()
-            self._build_line_search_tree()
+    @property
+    def subprograms(self):
+        if self._subprograms is None:
+            self._subprograms = []
+            if self.dwarfinfo is not None:
+                self._get_subprograms()
+        return self._subprograms
+
+    @property
+    def function_index(self):
+        if self._function_index is None:
+            if self.dwarfinfo is not None:
+                self._build_function_search_tree()
+            else:
+                self._function_index = AddressRangeIndex()
+        return self._function_index
+
+    @property
+    def line_index(self):
+        if self._line_index is None:
+            if self.dwarfinfo is not None:
+                self._build_line_search_tree()
+            else:
+                self._line_index = AddressRangeIndex()
+        return self._line_index
 
     def get_function_for_address(self, addr):
-        try:
-            return sorted(self.function_tree[addr])[0].data
-        except IndexError:
-            return None
+        return self.function_index.get(addr)
 
     def get_line_for_address(self, addr):
-        try:
-            return sorted(self.line_tree[addr])[0].data
-        except IndexError:
-            return None
+        return self.line_index.get(addr)
 
     def _get_subprograms(self):
         for CU in self.dwarfinfo.iter_CUs():
-            self.subprograms.extend([d for d in CU.iter_DIEs() if d.tag == 'DW_TAG_subprogram'])
+            self._subprograms.extend([d for d in CU.iter_DIEs() if d.tag == 'DW_TAG_subprogram'])
 
     def _build_function_search_tree(self):
+        ranges = []
         for prog in self.subprograms:
             try:
                 name = prog.attributes['DW_AT_name'].value
@@ -154,13 +269,20 @@ class DwarfAddressDecoder(object):
 
                 fninfo = FunctionInfo(name=name, subprogram=prog, low_pc=low_pc, high_pc=high_pc)
 
-                self.function_tree.addi(low_pc, high_pc, fninfo)
+                ranges.append((low_pc, high_pc, fninfo))
             except KeyError:
                 pass
 
+        self._function_index = AddressRangeIndex(ranges)
+
     def _build_line_search_tree(self):
+        ranges = []
         for cu in self.dwarfinfo.iter_CUs():
             lineprog = self.dwarfinfo.line_program_for_CU(cu)
+            file_entries = lineprog['file_entry']
+            include_dirs = lineprog['include_directory']
+            # Many line table rows share a file and line, so reuse the LineInfo objects.
+            line_infos = {}
             prevstate = None
             skipThisSequence = False
             for entry in lineprog.get_entries():
@@ -179,28 +301,27 @@ class DwarfAddressDecoder(object):
 
                 # Looking for a range of addresses in two consecutive states.
                 if prevstate and not skipThisSequence:
-                    try:
-                        fileinfo = lineprog['file_entry'][prevstate.file - 1]
-                        filename = fileinfo.name
-                        try:
-                            dirname = lineprog['include_directory'][fileinfo.dir_index - 1]
-                        except IndexError:
-                            dirname = ""
-                    except IndexError:
-                        filename = ""
-                        dirname = ""
-                    info = LineInfo(cu=cu, filename=filename, dirname=dirname, line=prevstate.line)
                     fromAddr = prevstate.address
                     toAddr = entry.state.address
-                    try:
-                        if fromAddr != 0 and toAddr != 0:
-                            if fromAddr == toAddr:
-                                toAddr += 1
-                            self.line_tree.addi(fromAddr, toAddr, info)
-                    except:
-                        LOG.debug("Problematic lineprog:")
-                        self._dump_lineprog(lineprog)
-                        raise
+                    if fromAddr != 0 and toAddr != 0:
+                        key = (prevstate.file, prevstate.line)
+                        info = line_infos.get(key)
+                        if info is None:
+                            try:
+                                fileinfo = file_entries[prevstate.file - 1]
+                                filename = fileinfo.name
+                                try:
+                                    dirname = include_dirs[fileinfo.dir_index - 1]
+                                except IndexError:
+                                    dirname = ""
+                            except IndexError:
+                                filename = ""
+                                dirname = ""
+                            info = LineInfo(cu=cu, filename=filename, dirname=dirname, line=prevstate.line)
+                            line_infos[key] = info
+                        if fromAddr == toAddr:
+                            toAddr += 1
+                        ranges.append((fromAddr, toAddr, info))
 
                 if entry.state.end_sequence:
                     prevstate = None
@@ -208,13 +329,7 @@ class DwarfAddressDecoder(object):
                 else:
                     prevstate = entry.state
 
-    def _dump_lineprog(self, lineprog):
-        for i, e in enumerate(lineprog.get_entries()):
-            s = e.state
-            if s is None:
-                LOG.debug("%d: cmd=%d ext=%d args=%s", i, e.command, int(e.is_extended), repr(e.args))
-            else:
-                LOG.debug("%d: %06x %4d stmt=%1d block=%1d end=%d file=[%d]%s", i, s.address, s.line, s.is_stmt, int(s.basic_block), int(s.end_sequence), s.file, lineprog['file_entry'][s.file-1].name)
+        self._line_index = AddressRangeIndex(ranges)
 
     def dump_subprograms(self):
         for prog in self.subprograms:
@@ -18,8 +18,17 @@ from ...core.memory_map import (MemoryRange, MemoryMap)
 from .decoder import (ElfSymbolDecoder, DwarfAddressDecoder)
 from elftools.elf.elffile import ELFFile
 from elftools.elf.constants import SH_FLAGS
+from bisect import bisect_left
+from itertools import islice
+from operator import attrgetter
 import six
 
+## Section types that can hold loadable contents.
+_WANTED_SH_TYPES = frozenset(('SHT_PROGBITS', 'SHT_NOBITS'))
+
+## Sections must have at least one of these flags set.
+_WANTED_SH_FLAGS = SH_FLAGS.SHF_WRITE | SH_FLAGS.SHF_ALLOC | SH_FLAGS.SHF_EXECINSTR
+
 class ELFSection(MemoryRange):
     """! @brief Memory range for a section of an ELF file.
     
@@ -38,6 +47,8 @@ class ELFSection(MemoryRange):
         self._elf = elf
         self._section = sect
         self._name = self._section.name
+        self._type = self._section['sh_type']
+        self._flags = self._section['sh_flags']
         self._data = None
 
         # Look up the corresponding memory region.
@@ -54,11 +65,11 @@ class ELFSection(MemoryRange):
         
     @property
     def type(self):
-        return self._section['sh_type']
+        return self._type
 
     @property
     def flags(self):
-        return self._section['sh_flags']
+        return self._flags
 
     @property
     def data(self):
@@ -130,15 +141,15 @@ class ELFBinaryFile(object):
         sections = self._elf.iter_sections()
         for s in sections:
             # Skip sections not of these types.
-            if s['sh_type'] not in ('SHT_PROGBITS', 'SHT_NOBITS'):
+            if s['sh_type'] not in _WANTED_SH_TYPES:
                 continue
 
             # Skip sections that don't have one of these flags set.
-            if s['sh_flags'] & (SH_FLAGS.SHF_WRITE | SH_FLAGS.SHF_ALLOC | SH_FLAGS.SHF_EXECINSTR) == 0:
+            if s['sh_flags'] & _WANTED_SH_FLAGS == 0:
                 continue
 
             self._sections.append(ELFSection(self, s))
-        self._sections.sort(key=lambda x: x.start)
+        self._sections.sort(key=attrgetter('start'))
 
     def _dump_sections(self):
         for s in self._sections:
@@ -148,12 +159,20 @@ class ELFBinaryFile(object):
     def _compute_regions(self):
         used = []
         unused = []
+        section_starts = [sect.start for sect in self._sections]
         for region in self._memory_map:
             current = region.start
-            for sect in self._sections:
+            # Sections are sorted by start address, so only those from the first one starting
+            # within the region up to the region's end need to be examined.
+            first = bisect_left(section_starts, region.start)
+            for sect in islice(self._sections, first, None):
                 start = sect.start
                 length = sect.length
 
+                # Stop once sections start past the end of the region.
+                if start > region.end:
+                    break
+
                 # Skip if this section isn't within this memory region.
                 if not region.contains_range(start, length=length):
                     continue
@@ -19,7 +19,6 @@ from ..core.exceptions import (FlashFailure, FlashProgramFailure)
 from ..utility.notification import Notification
 from ..utility.mask import same
 import logging
-from struct import unpack
 from time import time
 from binascii import crc32
 
@@ -324,13 +323,16 @@ class FlashBuilder(object):
             sector_page_number = 0
             sector_page_addr = sector.addr
 
-            def add_page_with_existing_data():
+            def add_page_with_existing_data(existing_data=None, offset=0):
                 page_info = self.flash.get_page_info(sector_page_addr)
                 if page_info is None:
                     raise FlashFailure("Attempt to program flash at invalid address 0x%08x" % sector_page_addr)
                 new_page = _FlashPage(page_info)
-                self._enable_read_access()
-                new_page.data = self.flash.target.read_memory_block8(new_page.addr, new_page.size)
+                if existing_data is not None and (offset + new_page.size) <= len(existing_data):
+                    new_page.data = existing_data[offset:offset + new_page.size]
+                else:
+                    self._enable_read_access()
+                    new_page.data = self.flash.target.read_memory_block8(new_page.addr, new_page.size)
                 new_page.same = True
                 sector.add_page(new_page)
                 self.page_list.append(new_page)
@@ -348,10 +350,20 @@ class FlashBuilder(object):
                 sector_page_number += 1
                 sector_page_addr += page.size
         
-            # Add missing pages at the end of the sector.
-            while sector_page_addr < sector.addr + sector.size:
-                page = add_page_with_existing_data()
-                sector_page_addr += page.size
+            # Add missing pages at the end of the sector. These pages are contiguous, so their
+            # existing contents are read with a single transfer and then split between the pages.
+            sector_end = sector.addr + sector.size
+            if sector_page_addr < sector_end:
+                # Check the first tail page before reading, so an invalid address is reported as a
+                # flash failure instead of a fault from the read.
+                if self.flash.get_page_info(sector_page_addr) is None:
+                    raise FlashFailure("Attempt to program flash at invalid address 0x%08x" % sector_page_addr)
+                self._enable_read_access()
+                tail_addr = sector_page_addr
+                tail_data = self.flash.target.read_memory_block8(tail_addr, sector_end - tail_addr)
+                while sector_page_addr < sector_end:
+                    page = add_page_with_existing_data(tail_data, sector_page_addr - tail_addr)
+                    sector_page_addr += page.size
 
     def program(self, chip_erase=None, progress_cb=None, smart_flash=True, fast_verify=False, keep_unwritten=True):
         """! @brief Determine fastest method of flashing and then run flash programming.
@@ -450,8 +462,8 @@ class FlashBuilder(object):
 
         # If chip erase hasn't been set then determine fastest method to program
         if chip_erase is None:
-            LOG.debug("Chip erase count %i, sector erase est count %i" % (chip_erase_count, sector_erase_count))
-            LOG.debug("Chip erase weight %f, sector erase weight %f" % (chip_erase_program_time, page_program_time))
+            LOG.debug("Chip erase count %i, sector erase est count %i", chip_erase_count, sector_erase_count)
+            LOG.debug("Chip erase weight %f, sector erase weight %f", chip_erase_program_time, page_program_time)
             chip_erase = chip_erase_program_time < page_program_time
 
         if chip_erase:
@@ -654,7 +666,7 @@ class FlashBuilder(object):
 
         analyze_finish = time()
         self.perf.analyze_time = analyze_finish - analyze_start
-        LOG.debug("Analyze time: %f" % (analyze_finish - analyze_start))
+        LOG.debug("Analyze time: %f", analyze_finish - analyze_start)
         
         return sector_erase_count, sector_erase_weight
 
@@ -769,14 +781,14 @@ class FlashBuilder(object):
                     progress_cb(float(progress) / float(self.sector_erase_weight))
                 
                 # The sector was erased, so we must program all pages in the sector
-                # regardless of whether they were the same or not.
+                # regardless of whether they were the same or not. The algo is inited once for
+                # all pages of the sector rather than around each page.
+                self.flash.init(self.flash.Operation.PROGRAM)
                 for page in sector.page_list:
 
                     progress += page.get_program_weight()
 
-                    self.flash.init(self.flash.Operation.PROGRAM)
                     self.flash.program_page(page.addr, page.data)
-                    self.flash.uninit()
             
                     actual_sector_erase_count += 1
                     actual_sector_erase_weight += page.get_program_weight()
@@ -784,6 +796,7 @@ class FlashBuilder(object):
                     # Update progress
                     if self.sector_erase_weight > 0:
                         progress_cb(float(progress) / float(self.sector_erase_weight))
+                self.flash.uninit()
 
         progress_cb(1.0)
 
@@ -855,10 +868,12 @@ class FlashBuilder(object):
         # to read from flash while simultaneously programming it.
         progress = self._scan_pages_for_same(progress_cb)
 
-        # Erase all sectors up front.
-        self.flash.init(self.flash.Operation.ERASE)
-        for sector in self.sector_list:
-            if sector.are_any_pages_not_same():
+        # Erase all sectors up front. The flash algo is only initialized for erasing if there
+        # is at least one sector whose contents are changing.
+        changed_sectors = [sector for sector in self.sector_list if sector.are_any_pages_not_same()]
+        if changed_sectors:
+            self.flash.init(self.flash.Operation.ERASE)
+            for sector in changed_sectors:
                 # Erase the sector
                 self.flash.erase_sector(sector.addr)
                 
@@ -866,7 +881,7 @@ class FlashBuilder(object):
                 progress += sector.erase_weight
                 if self.sector_erase_weight > 0:
                     progress_cb(float(progress) / float(self.sector_erase_weight))
-        self.flash.uninit()
+            self.flash.uninit()
 
         # Set up page and buffer info.
         current_buf = 0
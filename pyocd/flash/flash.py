@@ -18,7 +18,6 @@ from ..core.target import Target
 from ..core.exceptions import (FlashFailure, FlashEraseFailure, FlashProgramFailure)
 from ..utility.mask import msb
 import logging
-from struct import unpack
 from time import time
 from enum import Enum
 from .builder import FlashBuilder
@@ -127,6 +126,10 @@ class Flash(object):
         ## Currently unused, but defined as part of the flash algorithm specification.
         VERIFY = 3
 
+    ## Core registers dumped after a flash algo call when algo debugging is enabled: r0-r15,
+    # xpsr, msp, psp, and the CFBP register.
+    ALGO_DEBUG_REGS = tuple(range(19)) + (20,)
+
     def __init__(self, target, flash_algo):
         self.target = target
         self.flash_algo = flash_algo
@@ -534,8 +537,9 @@ class Flash(object):
             pass
 
         if self.flash_algo_debug:
-            regs = self.target.read_core_registers_raw(list(range(19)) + [20])
-            LOG.debug("Registers after flash algo: [%s]", " ".join("%08x" % r for r in regs))
+            regs = self.target.read_core_registers_raw(self.ALGO_DEBUG_REGS)
+            if LOG.isEnabledFor(logging.DEBUG):
+                LOG.debug("Registers after flash algo: [%s]", " ".join("%08x" % r for r in regs))
 
             expected_fp = self.flash_algo['static_base']
             expected_sp = self.flash_algo['begin_stack']
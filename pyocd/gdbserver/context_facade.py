@@ -17,8 +17,10 @@
 from ..utility import conversion
 from ..core.memory_map import MemoryType
 from . import signals
+import binascii
 import logging
 import six
+import struct
 from xml.etree import ElementTree
 
 LOG = logging.getLogger(__name__)
@@ -39,6 +41,16 @@ FAULT = [
                                                 # The rest are not faults
          ]
 
+## @brief Stop reply prefixes, indexed by signal number.
+T_RESPONSE_PREFIX = [six.b('T' + conversion.byte_to_hex2(i)) for i in range(256)]
+
+## @brief Registers reported in a T response: fp(r7), sp(r13), lr(r14), pc(r15).
+T_RESPONSE_REGISTERS = [7, 13, 14, 15]
+
+## @brief Structs used to pack register values for hex encoding.
+U32LE = struct.Struct("<I")
+U64LE = struct.Struct("<Q")
+
 ## @brief Map from the memory type enums to gdb's memory region type names.
 GDB_TYPE_MAP = {
     MemoryType.RAM: 'ram',
@@ -52,6 +64,7 @@ class GDBDebugContextFacade(object):
     def __init__(self, context):
         self._context = context
         self._register_list = self._context.core.register_list
+        self._memory_map_xml = None
 
     @property
     def context(self):
@@ -64,18 +77,19 @@ class GDBDebugContextFacade(object):
         """! @brief Return hexadecimal dump of registers as expected by GDB.
         """
         LOG.debug("GDB getting register context")
-        resp = b''
         reg_num_list = [reg.reg_num for reg in self._register_list]
         vals = self._context.read_core_registers_raw(reg_num_list)
         #print("Vals: %s" % vals)
+        # Pack all registers little endian and hex encode them in one step.
+        packed = []
         for reg, regValue in zip(self._register_list, vals):
             if reg.bitsize == 64:
-                resp += six.b(conversion.u64_to_hex16le(regValue))
+                packed.append(U64LE.pack(regValue & 0xFFFFFFFFFFFFFFFF))
             else:
-                resp += six.b(conversion.u32_to_hex8le(regValue))
+                packed.append(U32LE.pack(regValue & 0xFFFFFFFF))
             LOG.debug("GDB reg: %s = 0x%X", reg.name, regValue)
 
-        return resp
+        return binascii.hexlify(b''.join(packed))
 
     def set_register_context(self, data):
         """! @brief Set registers from GDB hexadecimal string.
@@ -132,13 +146,12 @@ class GDBDebugContextFacade(object):
         - The signal encountered.
         - The current value of the important registers (sp, lr, pc).
         """
-        if forceSignal is not None:
-            response = six.b('T' + conversion.byte_to_hex2(forceSignal))
-        else:
-            response = six.b('T' + conversion.byte_to_hex2(self.get_signal_value()))
+        if forceSignal is None:
+            forceSignal = self.get_signal_value()
+        response = T_RESPONSE_PREFIX[forceSignal]
 
         # Append fp(r7), sp(r13), lr(r14), pc(r15)
-        response += self.get_reg_index_value_pairs([7, 13, 14, 15])
+        response += self.get_reg_index_value_pairs(T_RESPONSE_REGISTERS)
 
         return response
 
@@ -151,10 +164,8 @@ class GDBDebugContextFacade(object):
 
         if self._context.core.is_vector_catch():
             fault = self._context.core.read_core_register('ipsr')
-            try:
+            if fault < len(FAULT):
                 signal = FAULT[fault]
-            except IndexError:
-                pass
 
         LOG.debug("GDB lastSignal: %d", signal)
         return signal
@@ -166,15 +177,20 @@ class GDBDebugContextFacade(object):
         for the T response string.  NN is the index of the
         register to follow MMMMMMMM is the value of the register.
         """
-        str = b''
         regList = self._context.read_core_registers_raw(regIndexList)
-        for regIndex, reg in zip(regIndexList, regList):
-            str += six.b(conversion.byte_to_hex2(regIndex) + ':' + conversion.u32_to_hex8le(reg) + ';')
-        return str
+        return six.b(''.join(conversion.byte_to_hex2(regIndex) + ':' + conversion.u32_to_hex8le(reg) + ';'
+                for regIndex, reg in zip(regIndexList, regList)))
 
     def get_memory_map_xml(self):
         """! @brief Generate GDB memory map XML.
+        
+        The XML is generated on the first call and cached, since gdb reads it in many chunks.
         """
+        if self._memory_map_xml is None:
+            self._memory_map_xml = self._build_memory_map_xml()
+        return self._memory_map_xml
+
+    def _build_memory_map_xml(self):
         root = ElementTree.Element('memory-map')
         for r in  self._context.core.memory_map:
             # Look up the region type name. Regions default to ram if gdb doesn't
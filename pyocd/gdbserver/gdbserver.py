@@ -16,20 +16,18 @@
 
 import logging
 import threading
-from struct import unpack
 from time import (sleep, time)
 import sys
-import six
-from xml.etree.ElementTree import (Element, SubElement, tostring)
+from xml.sax.saxutils import (escape as xml_escape, quoteattr)
 
 from ..core import exceptions
 from ..core.target import Target
 from ..flash.loader import FlashLoader
 from ..flash.eraser import FlashEraser
 from ..utility.cmdline import convert_vector_catch
-from ..utility.conversion import (hex_to_byte_list, hex_encode, hex_decode, hex8_to_u32le)
+from ..utility.conversion import (hex_encode, hex_decode, hex8_to_u32le)
 from ..utility.progress import print_progress
-from ..utility.compatibility import (iter_single_bytes, to_bytes_safe, to_str_safe)
+from ..utility.compatibility import (to_bytes_safe, to_str_safe)
 from ..utility.server import StreamServer
 from ..trace.swv import SWVReader
 from ..utility.sockets import ListenerSocket
@@ -52,27 +50,64 @@ LOG = logging.getLogger(__name__)
 TRACE_MEM = LOG.getChild("trace.mem")
 TRACE_MEM.setLevel(logging.CRITICAL)
 
+## @brief Framed packets for the constant replies sent most often, so they aren't rebuilt each time.
+RSP_EMPTY = b'$#' + checksum(b'')
+RSP_OK = b'$OK#' + checksum(b'OK')
+RSP_E01 = b'$E01#' + checksum(b'E01')
+
+## @brief Characters that must be escaped in binary data sent to gdb.
+ESCAPE_CHARS = b'#$}*'
+
+## @brief Byte values of ESCAPE_CHARS.
+ESCAPED_BYTES = frozenset(bytearray(ESCAPE_CHARS))
+
+## @brief Features reported to gdb in every qSupported reply.
+SUPPORTED_FEATURES = (b'qXfer:features:read+', b'QStartNoAckMode+', b'qXfer:threads:read+', b'QNonStop+')
+
+## @brief Maximum time in seconds to wait for a packet before rechecking the connection state.
+RECEIVE_POLL_INTERVAL = 0.1
+
+## Initial interval in seconds between target state polls while the target is running.
+#
+# The interval grows by RUN_POLL_BACKOFF after each poll that finds the target still running, up to
+# RUN_POLL_MAX_INTERVAL. Short runs, such as stepping over a call, are noticed quickly without
+# long runs polling the probe at a high rate. A Ctrl-C from gdb ends the wait immediately.
+RUN_POLL_MIN_INTERVAL = 0.001
+RUN_POLL_MAX_INTERVAL = 0.05
+RUN_POLL_BACKOFF = 1.5
+
+def strip_checksum(data):
+    """! @brief Removes the trailing '#cc' checksum from a received packet.
+    
+    @param data Bytes-like object containing packet data, optionally followed by the checksum.
+    @return The data before the '#', or all of the data if there is no '#'.
+    """
+    end = data.find(b'#')
+    if end == -1:
+        return data
+    return data[:end]
+
 def unescape(data):
     """! @brief De-escapes binary data from Gdb.
     
     @param data Bytes-like object with possibly escaped values.
-    @return List of integers in the range 0-255, with all escaped bytes de-escaped.
+    @return Bytearray with all escaped bytes de-escaped.
     """
+    data = bytearray(data)
+    result = bytearray()
     data_idx = 0
 
-    # unpack the data into binary array
-    str_unpack = str(len(data)) + 'B'
-    data = unpack(str_unpack, data)
-    data = list(data)
-
-    # check for escaped characters
-    while data_idx < len(data):
-        if data[data_idx] == 0x7d:
-            data.pop(data_idx)
-            data[data_idx] = data[data_idx] ^ 0x20
-        data_idx += 1
+    # Copy the runs between escape characters in one step, and de-escape the byte following each.
+    while True:
+        escape_idx = data.find(b'}', data_idx)
+        if escape_idx == -1:
+            result += data[data_idx:]
+            break
+        result += data[data_idx:escape_idx]
+        result.append(data[escape_idx + 1] ^ 0x20)
+        data_idx = escape_idx + 2
 
-    return data
+    return result
 
 def escape(data):
     """! @brief Escape binary data to be sent to Gdb.
@@ -80,13 +115,19 @@ def escape(data):
     @param data Bytes-like object containing raw binary.
     @return Bytes object with the characters in '#$}*' escaped as required by Gdb.
     """
-    result = b''
-    for c in iter_single_bytes(data):
-        if c in b'#$}*':
-            result += b'}' + six.int2byte(six.byte2int(c) ^ 0x20)
+    data = bytearray(data)
+    # Most payloads contain nothing to escape, which translate() can check without a Python loop.
+    if len(data.translate(None, ESCAPE_CHARS)) == len(data):
+        return bytes(data)
+
+    result = bytearray()
+    for c in data:
+        if c in ESCAPED_BYTES:
+            result.append(0x7d) # '}'
+            result.append(c ^ 0x20)
         else:
-            result += c
-    return result
+            result.append(c)
+    return bytes(result)
 
 class GDBError(exceptions.Error):
     """! @brief Error communicating with GDB."""
@@ -144,6 +185,8 @@ class GDBServer(threading.Thread):
         self.did_init_thread_providers = False
         self.current_thread_id = 0
         self.first_run_after_reset_or_flash = True
+        self._xml_cache = {}
+        self._register_cache = None
 
         self.abstract_socket = ListenerSocket(self.port, self.packet_size)
         if self.serve_local_only:
@@ -224,9 +267,32 @@ class GDBServer(threading.Thread):
                 b'Z' : (self.breakpoint,         1   ), # Remove breakpoint/watchpoint.
             }
 
+        # General query handler table.
+        #
+        # The dict keys are the query name following the "q", with the checksum and any
+        # ":"-separated arguments removed. Each handler is passed the list of ":"-separated
+        # query fields. "qRcmd," is matched by prefix in handle_query() since its argument
+        # is not separated by a colon.
+        self.QUERY_COMMANDS = {
+        #       QUERY          HANDLER                     DESCRIPTION
+                b'Supported' : self.query_supported,      # Feature negotiation.
+                b'Xfer' :      self.query_xfer,           # Read target XML documents.
+                b'C' :         self.query_current_thread, # Current thread ID.
+                b'Attached' :  self.query_attached,       # Attached to an existing process?
+                b'TStatus' :   self.query_unsupported,    # Tracepoint status.
+                b'TfV' :       self.query_unsupported,    # Tracepoint variables.
+                b'TfP' :       self.query_unsupported,    # Tracepoints.
+                b'Offsets' :   self.query_offsets,        # Section offsets.
+                b'Symbol' :    self.query_symbol,         # Symbol lookup offer.
+            }
+
         # Commands that kill the connection to gdb.
         self.DETACH_COMMANDS = (b'D', b'k')
 
+        # Commands that can neither change register values nor switch the debug context, so the
+        # cached 'g' reply stays valid across them. Any other command drops the cache.
+        self.REGISTER_CACHE_COMMANDS = (b'g', b'm', b'p')
+
         # pylint: enable=invalid-name
 
         self.setDaemon(True)
@@ -239,14 +305,17 @@ class GDBServer(threading.Thread):
     def stop(self):
         if self.isAlive():
             self.shutdown_event.set()
-            while self.isAlive():
-                pass
-            LOG.info("GDB server thread killed")
+            self.join(5.0)
+            if self.isAlive():
+                LOG.warning("GDB server thread did not stop")
+            else:
+                LOG.info("GDB server thread killed")
 
     def _cleanup(self):
         LOG.debug("GDB server cleaning up")
         if self.packet_io:
             self.packet_io.stop()
+            self.packet_io.join(1.0)
             self.packet_io = None
         if self.semihost:
             self.semihost.cleanup()
@@ -264,6 +333,8 @@ class GDBServer(threading.Thread):
         self.thread_provider = None
         self.did_init_thread_providers = False
         self.current_thread_id = 0
+        self._xml_cache = {}
+        self._register_cache = None
 
     def run(self):
         LOG.info('GDB server started on port %d (core %d)', self.port, self.core)
@@ -325,9 +396,10 @@ class GDBServer(threading.Thread):
                     except Exception as e:
                         LOG.error("Unexpected exception: %s", e, exc_info=self.session.log_tracebacks)
 
-                # read command
+                # Read command. The wait ends as soon as a packet arrives, and times out so the
+                # events above and the target state in non-stop mode are checked regularly.
                 try:
-                    packet = self.packet_io.receive(block=not self.non_stop)
+                    packet = self.packet_io.receive(timeout=RECEIVE_POLL_INTERVAL)
                 except ConnectionClosedException:
                     break
 
@@ -338,8 +410,7 @@ class GDBServer(threading.Thread):
                 if self.detach_event.isSet():
                     break
 
-                if self.non_stop and packet is None:
-                    sleep(0.1)
+                if packet is None:
                     continue
 
                 if len(packet) != 0:
@@ -368,31 +439,34 @@ class GDBServer(threading.Thread):
         try:
             assert msg[0:1] == b'$', "invalid first char of message != $"
 
+            cmd = msg[1:2]
             try:
-                handler, msgStart = self.COMMANDS[msg[1:2]]
-            except (KeyError, IndexError):
+                handler, msgStart = self.COMMANDS[cmd]
+            except KeyError:
                 LOG.error("Unknown RSP packet: %s", msg)
-                return self.create_rsp_packet(b""), 0
+                return RSP_EMPTY, 0
+
+            if cmd not in self.REGISTER_CACHE_COMMANDS:
+                self._register_cache = None
 
             if msgStart == 0:
                 reply = handler()
             else:
                 reply = handler(msg[msgStart:])
-            detach = 1 if msg[1:2] in self.DETACH_COMMANDS else 0
+            detach = 1 if cmd in self.DETACH_COMMANDS else 0
             return reply, detach
 
         except Exception as e:
             LOG.error("Unhandled exception in handle_message: %s", e, exc_info=self.session.log_tracebacks)
-            return self.create_rsp_packet(b"E01"), 0
+            return RSP_E01, 0
 
     def extended_remote(self):
         self._is_extended_remote = True
-        return self.create_rsp_packet(b"OK")
+        return RSP_OK
 
     def detach(self, data):
         LOG.info("Client detached")
-        resp = b"OK"
-        return self.create_rsp_packet(resp)
+        return RSP_OK
 
     def kill(self):
         LOG.debug("GDB kill")
@@ -400,7 +474,7 @@ class GDBServer(threading.Thread):
         if not self.persist:
             self.board.target.set_vector_catch(Target.VectorCatch.NONE)
             self.board.target.resume()
-        return self.create_rsp_packet(b"")
+        return RSP_EMPTY
     
     def restart(self, data):
         self.target.reset_and_halt()
@@ -408,27 +482,27 @@ class GDBServer(threading.Thread):
 
     def breakpoint(self, data):
         # handle breakpoint/watchpoint commands
-        split = data.split(b'#')[0].split(b',')
+        split = strip_checksum(data).split(b',')
         addr = int(split[1], 16)
-        LOG.debug("GDB breakpoint %s%d @ %x" % (data[0:1], int(data[1:2]), addr))
+        LOG.debug("GDB breakpoint %s%d @ %x", data[0:1], int(data[1:2]), addr)
 
         # handle software breakpoint Z0/z0
         if data[1:2] == b'0':
             if data[0:1] == b'Z':
                 if not self.target.set_breakpoint(addr, Target.BreakpointType.SW):
-                    return self.create_rsp_packet(b'E01') #EPERM
+                    return RSP_E01 #EPERM
             else:
                 self.target.remove_breakpoint(addr)
-            return self.create_rsp_packet(b"OK")
+            return RSP_OK
 
         # handle hardware breakpoint Z1/z1
         if data[1:2] == b'1':
             if data[0:1] == b'Z':
                 if self.target.set_breakpoint(addr, Target.BreakpointType.HW) is False:
-                    return self.create_rsp_packet(b'E01') #EPERM
+                    return RSP_E01 #EPERM
             else:
                 self.target.remove_breakpoint(addr)
-            return self.create_rsp_packet(b"OK")
+            return RSP_OK
 
         # handle hardware watchpoint Z2/z2/Z3/z3/Z4/z4
         if data[1:2] == b'2':
@@ -441,25 +515,25 @@ class GDBServer(threading.Thread):
             # Read-Write watch
             watchpoint_type = Target.WatchpointType.READ_WRITE
         else:
-            return self.create_rsp_packet(b'E01') #EPERM
+            return RSP_E01 #EPERM
 
         size = int(split[2], 16)
         if data[0:1] == b'Z':
             if self.target.set_watchpoint(addr, size, watchpoint_type) is False:
-                return self.create_rsp_packet(b'E01') #EPERM
+                return RSP_E01 #EPERM
         else:
             self.target.remove_watchpoint(addr, size, watchpoint_type)
-        return self.create_rsp_packet(b"OK")
+        return RSP_OK
 
     def set_thread(self, data):
         if not self.is_threading_enabled():
-            return self.create_rsp_packet(b'OK')
+            return RSP_OK
 
         LOG.debug("set_thread:%s", data)
         op = data[0:1]
         thread_id = int(data[1:-3], 16)
         if not (thread_id in (0, -1) or self.thread_provider.is_valid_thread_id(thread_id)):
-            return self.create_rsp_packet(b'E01')
+            return RSP_E01
 
         if op == b'c':
             pass
@@ -474,10 +548,10 @@ class GDBServer(threading.Thread):
                     thread = self.thread_provider.get_thread(thread_id)
                 self.target_facade.set_context(thread.context)
         else:
-            return self.create_rsp_packet(b'E01')
+            return RSP_E01
 
         self.current_thread_id = thread_id
-        return self.create_rsp_packet(b'OK')
+        return RSP_OK
 
     def is_thread_alive(self, data):
         threadId = int(data[1:-3], 16)
@@ -488,7 +562,7 @@ class GDBServer(threading.Thread):
             isAlive = (threadId == 1)
 
         if isAlive:
-            return self.create_rsp_packet(b'OK')
+            return RSP_OK
         else:
             self.validate_debug_context()
             return self.create_rsp_packet(b'E00')
@@ -508,14 +582,14 @@ class GDBServer(threading.Thread):
     def stop_reason_query(self):
         # In non-stop mode, if no threads are stopped we need to reply with OK.
         if self.non_stop and self.is_target_running:
-            return self.create_rsp_packet(b"OK")
+            return RSP_OK
 
         return self.create_rsp_packet(self.get_t_response())
 
     def _get_resume_step_addr(self, data):
         if data is None:
             return None
-        data = data.split(b'#')[0]
+        data = strip_checksum(data)
         if b';' not in data:
             return None
         # c[;addr]
@@ -537,6 +611,7 @@ class GDBServer(threading.Thread):
                 self.thread_provider.read_from_target = True
 
         val = b''
+        poll_interval = RUN_POLL_MIN_INTERVAL
 
         while True:
             if self.shutdown_event.isSet():
@@ -544,7 +619,7 @@ class GDBServer(threading.Thread):
                 return self.create_rsp_packet(val)
 
             # Wait for a ctrl-c to be received.
-            if self.packet_io.interrupt_event.wait(0.01):
+            if self.packet_io.interrupt_event.wait(poll_interval):
                 LOG.debug("receive CTRL-C")
                 self.packet_io.interrupt_event.clear()
                 self.target.halt()
@@ -559,12 +634,15 @@ class GDBServer(threading.Thread):
 
                         if was_semihost:
                             self.target.resume()
+                            poll_interval = RUN_POLL_MIN_INTERVAL
                             continue
 
                     pc = self.target_context.read_core_register('pc')
                     LOG.debug("state halted; pc=0x%08x", pc)
                     val = self.get_t_response()
                     break
+
+                poll_interval = min(poll_interval * RUN_POLL_BACKOFF, RUN_POLL_MAX_INTERVAL)
             except exceptions.Error as e:
                 try:
                     self.target.halt()
@@ -588,11 +666,11 @@ class GDBServer(threading.Thread):
 
     def send_stop_notification(self, forceSignal=None):
         data = self.get_t_response(forceSignal=forceSignal)
-        packet = b'%Stop:' + data + b'#' + checksum(data)
+        packet = b''.join((b'%Stop:', data, b'#', checksum(data)))
         self.packet_io.send(packet)
 
     def v_command(self, data):
-        cmd = data.split(b'#')[0]
+        cmd = strip_checksum(data)
 
         # Flash command.
         if cmd.startswith(b'Flash'):
@@ -609,21 +687,18 @@ class GDBServer(threading.Thread):
         # vStopped, part of thread stop state notification sequence.
         elif b'Stopped' in cmd:
             # Because we only support one thread for now, we can just reply OK to vStopped.
-            return self.create_rsp_packet(b"OK")
+            return RSP_OK
 
-        return self.create_rsp_packet(b"")
+        return RSP_EMPTY
 
     # Example: $v_cont;s:1;c#c1
     def v_cont(self, cmd):
         ops = cmd.split(b';')[1:] # split and remove 'Cont' from list
         if not ops:
-            return self.create_rsp_packet(b"OK")
+            return RSP_OK
 
         if self.is_threading_enabled():
-            thread_actions = {}
-            threads = self.thread_provider.get_threads()
-            for k in threads:
-                thread_actions[k.unique_id] = None
+            thread_actions = dict.fromkeys(t.unique_id for t in self.thread_provider.get_threads())
             currentThread = self.thread_provider.get_current_thread_id()
         else:
             thread_actions = { 1 : None } # our only thread
@@ -631,72 +706,71 @@ class GDBServer(threading.Thread):
         default_action = None
 
         for op in ops:
-            args = op.split(b':')
-            action = args[0]
-            if len(args) > 1:
-                thread_id = int(args[1], 16)
+            action, sep, thread_id = op.partition(b':')
+            if sep:
+                thread_id = int(thread_id, 16)
                 if thread_id == -1 or thread_id == 0:
                     thread_id = currentThread
                 thread_actions[thread_id] = action
             else:
                 default_action = action
 
-        LOG.debug("thread_actions=%s; default_action=%s", repr(thread_actions), default_action)
+        LOG.debug("thread_actions=%r; default_action=%s", thread_actions, default_action)
 
         # Only the current thread is supported at the moment.
-        if thread_actions[currentThread] is None:
+        action = thread_actions[currentThread]
+        if action is None:
             if default_action is None:
-                return self.create_rsp_packet(b'E01')
-            thread_actions[currentThread] = default_action
+                return RSP_E01
+            action = default_action
+        action_type = action[0:1]
 
-        if thread_actions[currentThread][0:1] in (b'c', b'C'):
+        if action_type in (b'c', b'C'):
             if self.non_stop:
                 self.target.resume()
                 self.is_target_running = True
-                return self.create_rsp_packet(b"OK")
+                return RSP_OK
             else:
                 return self.resume(None)
-        elif thread_actions[currentThread][0:1] in (b's', b'S', b'r'):
+        elif action_type in (b's', b'S', b'r'):
             start = 0
             end = 0
-            if thread_actions[currentThread][0:1] == b'r':
-                start, end = [int(addr, base=16) for addr in thread_actions[currentThread][1:].split(b',')]
+            if action_type == b'r':
+                start, end = [int(addr, base=16) for addr in action[1:].split(b',')]
 	
             if self.non_stop:
                 self.target.step(not self.step_into_interrupt, start, end)
-                self.packet_io.send(self.create_rsp_packet(b"OK"))
+                self.packet_io.send(RSP_OK)
                 self.send_stop_notification()
                 return None
             else:
                 return self.step(None, start, end)
-        elif thread_actions[currentThread] == b't':
+        elif action == b't':
             # Must ignore t command in all-stop mode.
             if not self.non_stop:
-                return self.create_rsp_packet(b"")
-            self.packet_io.send(self.create_rsp_packet(b"OK"))
+                return RSP_EMPTY
+            self.packet_io.send(RSP_OK)
             self.target.halt()
             self.is_target_running = False
             self.send_stop_notification(forceSignal=0)
         else:
-            LOG.error("Unsupported v_cont action '%s'" % thread_actions[1:2])
+            LOG.error("Unsupported v_cont action '%s'", action)
 
     def flash_op(self, data):
-        ops = data.split(b':')[0]
+        # Only the small header is sliced; the vFlashWrite payload may be large.
+        first_colon = data.find(b':')
+        ops = data if first_colon == -1 else data[:first_colon]
         LOG.debug("flash op: %s", ops)
 
         if ops == b'FlashErase':
-            return self.create_rsp_packet(b"OK")
+            return RSP_OK
 
         elif ops == b'FlashWrite':
-            write_addr = int(data.split(b':')[1], 16)
-            LOG.debug("flash write addr: 0x%x", write_addr)
             # search for second ':' (beginning of data encoded in the message)
-            second_colon = 0
-            idx_begin = 0
-            while second_colon != 2:
-                if data[idx_begin:idx_begin+1] == b':':
-                    second_colon += 1
-                idx_begin += 1
+            second_colon = data.index(b':', first_colon + 1)
+            write_addr = int(data[first_colon + 1:second_colon], 16)
+            LOG.debug("flash write addr: 0x%x", write_addr)
+            idx_begin = second_colon + 1
 
             # Get flash loader if there isn't one already
             if self.flash_loader is None:
@@ -705,7 +779,7 @@ class GDBServer(threading.Thread):
             # Add data to flash loader
             self.flash_loader.add_data(write_addr, unescape(data[idx_begin:len(data) - 3]))
 
-            return self.create_rsp_packet(b"OK")
+            return RSP_OK
 
         # we need to flash everything
         elif b'FlashDone' in ops :
@@ -722,14 +796,13 @@ class GDBServer(threading.Thread):
             if self.thread_provider is not None:
                 self.thread_provider.read_from_target = False
 
-            return self.create_rsp_packet(b"OK")
+            return RSP_OK
 
         return None
 
     def get_memory(self, data):
-        split = data.split(b',')
-        addr = int(split[0], 16)
-        length = split[1].split(b'#')[0]
+        addr, _, length = strip_checksum(data).partition(b',')
+        addr = int(addr, 16)
         length = int(length, 16)
 
         TRACE_MEM.debug("GDB getMem: addr=%x len=%x", addr, length)
@@ -740,22 +813,21 @@ class GDBServer(threading.Thread):
             self.target_context.flush()
             val = hex_encode(bytearray(mem))
         except exceptions.TransferError:
-            LOG.debug("get_memory failed at 0x%x" % addr)
-            val = b'E01' #EPERM
+            LOG.debug("get_memory failed at 0x%x", addr)
+            return RSP_E01 #EPERM
         except MemoryAccessError as e:
             LOG.debug("get_memory failed at 0x%x: %s", addr, str(e))
-            val = b'E01' #EPERM
+            return RSP_E01 #EPERM
         return self.create_rsp_packet(val)
 
     def write_memory_hex(self, data):
-        split = data.split(b',')
-        addr = int(split[0], 16)
+        addr, _, data = strip_checksum(data).partition(b',')
+        addr = int(addr, 16)
 
-        split = split[1].split(b':')
-        length = int(split[0], 16)
+        length, _, data = data.partition(b':')
+        length = int(length, 16)
 
-        split = split[1].split(b'#')
-        data = hex_to_byte_list(split[0])
+        data = bytearray(hex_decode(data))
 
         TRACE_MEM.debug("GDB writeMemHex: addr=%x len=%x", addr, length)
 
@@ -764,24 +836,24 @@ class GDBServer(threading.Thread):
                 self.target_context.write_memory_block8(addr, data)
                 # Flush so an exception is thrown now if invalid memory was accessed
                 self.target_context.flush()
-            resp = b"OK"
+            return RSP_OK
         except exceptions.TransferError:
-            LOG.debug("write_memory failed at 0x%x" % addr)
-            resp = b'E01' #EPERM
+            LOG.debug("write_memory failed at 0x%x", addr)
+            return RSP_E01 #EPERM
         except MemoryAccessError as e:
-            LOG.debug("get_memory failed at 0x%x: %s", addr, str(e))
-            val = b'E01' #EPERM
-
-        return self.create_rsp_packet(resp)
+            LOG.debug("write_memory failed at 0x%x: %s", addr, str(e))
+            return RSP_E01 #EPERM
 
     def write_memory(self, data):
-        split = data.split(b',')
-        addr = int(split[0], 16)
-        length = int(split[1].split(b':')[0], 16)
+        # Parse the header before the ':' without splitting the binary payload, which may contain
+        # any byte value.
+        idx_begin = data.index(b':') + 1
+        addr, _, length = data[:idx_begin - 1].partition(b',')
+        addr = int(addr, 16)
+        length = int(length, 16)
 
         TRACE_MEM.debug("GDB writeMem: addr=%x len=%x", addr, length)
 
-        idx_begin = data.index(b':') + 1
         data = data[idx_begin:len(data) - 3]
         data = unescape(data)
 
@@ -790,105 +862,112 @@ class GDBServer(threading.Thread):
                 self.target_context.write_memory_block8(addr, data)
                 # Flush so an exception is thrown now if invalid memory was accessed
                 self.target_context.flush()
-            resp = b"OK"
+            return RSP_OK
         except exceptions.TransferError:
-            LOG.debug("write_memory failed at 0x%x" % addr)
-            resp = b'E01' #EPERM
+            LOG.debug("write_memory failed at 0x%x", addr)
+            return RSP_E01 #EPERM
         except MemoryAccessError as e:
-            LOG.debug("get_memory failed at 0x%x: %s", addr, str(e))
-            val = b'E01' #EPERM
-
-        return self.create_rsp_packet(resp)
+            LOG.debug("write_memory failed at 0x%x: %s", addr, str(e))
+            return RSP_E01 #EPERM
 
     def read_register(self, which):
         return self.create_rsp_packet(self.target_facade.gdb_get_register(which))
 
     def write_register(self, data):
         reg = int(data.split(b'=')[0], 16)
-        val = data.split(b'=')[1].split(b'#')[0]
+        val = strip_checksum(data.split(b'=')[1])
         self.target_facade.set_register(reg, val)
-        return self.create_rsp_packet(b"OK")
+        return RSP_OK
 
     def get_registers(self):
-        return self.create_rsp_packet(self.target_facade.get_register_context())
+        # While the target is running its registers change underneath us, so always read them
+        # and leave the cache alone. The halt is noticed by the connection loop rather than by a
+        # packet, so a reply cached now would not be dropped before the next 'g'.
+        if self.is_target_running:
+            return self.create_rsp_packet(self.target_facade.get_register_context())
+
+        # While the target stays halted, repeated 'g' packets get the same reply without
+        # rereading the registers. The cache is dropped by handle_message() and on reset.
+        if self._register_cache is None:
+            self._register_cache = self.create_rsp_packet(self.target_facade.get_register_context())
+        return self._register_cache
 
     def set_registers(self, data):
         self.target_facade.set_register_context(data)
-        return self.create_rsp_packet(b"OK")
+        return RSP_OK
 
     def handle_query(self, msg):
         query = msg.split(b':')
         LOG.debug('GDB received query: %s', query)
 
-        if query is None:
-            LOG.error('GDB received query packet malformed')
-            return None
-
-        if query[0] == b'Supported':
-            # Save features sent by gdb.
+        # Queries without arguments still have the checksum attached to the name.
+        name = strip_checksum(query[0])
+        try:
+            handler = self.QUERY_COMMANDS[name]
+        except KeyError:
+            if name.startswith(b'Rcmd,'):
+                cmd = hex_decode(name[5:])
+                return self.handle_remote_command(cmd)
+            return RSP_EMPTY
+        return handler(query)
+
+    def query_supported(self, query):
+        # Save features sent by gdb. The feature list is optional.
+        if len(query) > 1:
             self.gdb_features = query[1].split(b';')
+        else:
+            self.gdb_features = []
+
+        # Build our list of features.
+        features = list(SUPPORTED_FEATURES)
+        features.append(('PacketSize=%x' % self.packet_size).encode())
+        if self.target_facade.get_memory_map_xml() is not None:
+            features.append(b'qXfer:memory-map:read+')
+        resp = b';'.join(features)
+        return self.create_rsp_packet(resp)
 
-            # Build our list of features.
-            features = [b'qXfer:features:read+', b'QStartNoAckMode+', b'qXfer:threads:read+', b'QNonStop+']
-            features.append(b'PacketSize=' + six.b(hex(self.packet_size))[2:])
-            if self.target_facade.get_memory_map_xml() is not None:
-                features.append(b'qXfer:memory-map:read+')
-            resp = b';'.join(features)
+    def query_xfer(self, query):
+        if query[1] == b'features' and query[2] == b'read' and \
+           query[3] == b'target.xml':
+            data = query[4].split(b',')
+            resp = self.handle_query_xml(b'read_feature', int(data[0], 16), int(strip_checksum(data[1]), 16))
             return self.create_rsp_packet(resp)
 
-        elif query[0] == b'Xfer':
-
-            if query[1] == b'features' and query[2] == b'read' and \
-               query[3] == b'target.xml':
-                data = query[4].split(b',')
-                resp = self.handle_query_xml(b'read_feature', int(data[0], 16), int(data[1].split(b'#')[0], 16))
-                return self.create_rsp_packet(resp)
-
-            elif query[1] == b'memory-map' and query[2] == b'read':
-                data = query[4].split(b',')
-                resp = self.handle_query_xml(b'memory_map', int(data[0], 16), int(data[1].split(b'#')[0], 16))
-                return self.create_rsp_packet(resp)
-
-            elif query[1] == b'threads' and query[2] == b'read':
-                data = query[4].split(b',')
-                resp = self.handle_query_xml(b'threads', int(data[0], 16), int(data[1].split(b'#')[0], 16))
-                return self.create_rsp_packet(resp)
-
-            else:
-                LOG.debug("Unsupported qXfer request: %s:%s:%s:%s", query[1], query[2], query[3], query[4])
-                return None
-
-        elif query[0].startswith(b'C'):
-            if not self.is_threading_enabled():
-                return self.create_rsp_packet(b"QC1")
-            else:
-                self.validate_debug_context()
-                return self.create_rsp_packet(("QC%x" % self.current_thread_id).encode())
+        elif query[1] == b'memory-map' and query[2] == b'read':
+            data = query[4].split(b',')
+            resp = self.handle_query_xml(b'memory_map', int(data[0], 16), int(strip_checksum(data[1]), 16))
+            return self.create_rsp_packet(resp)
 
-        elif query[0].find(b'Attached') != -1:
-            return self.create_rsp_packet(b"1")
+        elif query[1] == b'threads' and query[2] == b'read':
+            data = query[4].split(b',')
+            resp = self.handle_query_xml(b'threads', int(data[0], 16), int(strip_checksum(data[1]), 16))
+            return self.create_rsp_packet(resp)
 
-        elif query[0].find(b'TStatus') != -1:
-            return self.create_rsp_packet(b"")
+        else:
+            LOG.debug("Unsupported qXfer request: %s:%s:%s:%s", query[1], query[2], query[3], query[4])
+            return None
 
-        elif query[0].find(b'Tf') != -1:
-            return self.create_rsp_packet(b"")
+    def query_current_thread(self, query):
+        if not self.is_threading_enabled():
+            return self.create_rsp_packet(b"QC1")
+        else:
+            self.validate_debug_context()
+            return self.create_rsp_packet(("QC%x" % self.current_thread_id).encode())
 
-        elif b'Offsets' in query[0]:
-            resp = b"Text=0;Data=0;Bss=0"
-            return self.create_rsp_packet(resp)
+    def query_attached(self, query):
+        return self.create_rsp_packet(b"1")
 
-        elif b'Symbol' in query[0]:
-            if self.did_init_thread_providers:
-                return self.create_rsp_packet(b"OK")
-            return self.init_thread_providers()
+    def query_offsets(self, query):
+        resp = b"Text=0;Data=0;Bss=0"
+        return self.create_rsp_packet(resp)
 
-        elif query[0].startswith(b'Rcmd,'):
-            cmd = hex_decode(query[0][5:].split(b'#')[0])
-            return self.handle_remote_command(cmd)
+    def query_symbol(self, query):
+        if self.did_init_thread_providers:
+            return RSP_OK
+        return self.init_thread_providers()
 
-        else:
-            return self.create_rsp_packet(b"")
+    def query_unsupported(self, query):
+        return RSP_EMPTY
 
     def init_thread_providers(self):
         symbol_provider = GDBSymbolProvider(self)
@@ -907,7 +986,7 @@ class GDBServer(threading.Thread):
         self.did_init_thread_providers = True
 
         # Done with symbol processing.
-        return self.create_rsp_packet(b"OK")
+        return RSP_OK
 
     def get_symbol(self, name):
         # Send the symbol request.
@@ -1016,33 +1095,40 @@ class GDBServer(threading.Thread):
         return self.create_rsp_packet(resp)
 
     def handle_general_set(self, msg):
-        feature = msg.split(b'#')[0]
+        feature = strip_checksum(msg)
         LOG.debug("GDB general set: %s", feature)
 
         if feature == b'StartNoAckMode':
             # Disable acks after the reply and ack.
             self.packet_io.set_send_acks(False)
-            return self.create_rsp_packet(b"OK")
+            return RSP_OK
 
         elif feature.startswith(b'NonStop'):
             enable = feature.split(b':')[1]
             self.non_stop = (enable == b'1')
-            return self.create_rsp_packet(b"OK")
+            return RSP_OK
 
         else:
-            return self.create_rsp_packet(b"")
+            return RSP_EMPTY
 
     def handle_query_xml(self, query, offset, size):
         LOG.debug('GDB query %s: offset: %s, size: %s', query, offset, size)
-        xml = ''
-        if query == b'memory_map':
-            xml = self.target_facade.get_memory_map_xml()
-        elif query == b'read_feature':
-            xml = self.target.get_target_xml()
-        elif query == b'threads':
-            xml = self.get_threads_xml()
+        # gdb reads the XML in chunks. The document is generated when the first chunk is requested
+        # and reused for the rest, so all chunks come from the same document. It is held in a
+        # memoryview so slicing out each chunk does not copy it before escaping.
+        if offset == 0 or query not in self._xml_cache:
+            if query == b'memory_map':
+                xml = self.target_facade.get_memory_map_xml()
+            elif query == b'read_feature':
+                xml = self.target.get_target_xml()
+            elif query == b'threads':
+                xml = self.get_threads_xml()
+            else:
+                raise GDBError("Invalid XML query (%s)" % query)
+            xml = memoryview(xml)
+            self._xml_cache[query] = xml
         else:
-            raise GDBError("Invalid XML query (%s)" % query)
+            xml = self._xml_cache[query]
 
         size_xml = len(xml)
 
@@ -1066,8 +1152,8 @@ class GDBServer(threading.Thread):
 
 
     def create_rsp_packet(self, data):
-        resp = b'$' + data + b'#' + checksum(data)
-        return resp
+        # Join the pieces in one step so large replies, such as memory reads, are copied only once.
+        return b''.join((b'$', data, b'#', checksum(data)))
 
     def syscall(self, op):
         op = to_bytes_safe(op)
@@ -1084,7 +1170,7 @@ class GDBServer(threading.Thread):
 
             # Check for file I/O response.
             if packet[0:1] == b'$' and packet[1:2] == b'F':
-                LOG.debug("Syscall: got syscall response " + packet)
+                LOG.debug("Syscall: got syscall response %s", packet)
                 args = packet[2:packet.index(b'#')].split(b',')
                 result = int(args[0], base=16)
                 errno = int(args[1], base=16) if len(args) > 1 else 0
@@ -1110,44 +1196,44 @@ class GDBServer(threading.Thread):
 
     def get_t_response(self, forceSignal=None):
         self.validate_debug_context()
-        response = self.target_facade.get_t_response(forceSignal)
+        parts = [self.target_facade.get_t_response(forceSignal)]
 
         # Append thread
         if not self.is_threading_enabled():
-            response += b"thread:1;"
+            parts.append(b"thread:1;")
         else:
             if self.current_thread_id in (-1, 0, 1):
-                response += ("thread:%x;" % self.thread_provider.current_thread.unique_id).encode()
+                parts.append(("thread:%x;" % self.thread_provider.current_thread.unique_id).encode())
             else:
-                response += ("thread:%x;" % self.current_thread_id).encode()
+                parts.append(("thread:%x;" % self.current_thread_id).encode())
 
         # Optionally append core
         if self.report_core:
-            response += ("core:%x;" % self.core).encode()
+            parts.append(("core:%x;" % self.core).encode())
+        response = b''.join(parts)
         LOG.debug("Tresponse=%s", response)
         return response
 
     def get_threads_xml(self):
-        root = Element('threads')
+        # The document is small and fixed in shape, so it is formatted directly rather than built
+        # as an element tree and serialized.
+        core = (' core="%d"' % self.core) if self.report_core else ''
+        parts = ['<?xml version="1.0"?><!DOCTYPE feature SYSTEM "threads.dtd"><threads>']
 
         if not self.is_threading_enabled():
-            t = SubElement(root, 'thread', id="1")
-            if self.report_core:
-                t.set("core", str(self.core))
             if self.is_target_in_reset():
-                t.text = "Reset"
+                description = "Reset"
             else:
-                t.text = self.exception_name()
+                description = self.exception_name()
+            parts.append('<thread id="1"%s>%s</thread>' % (core, xml_escape(description or '')))
         else:
             threads = self.thread_provider.get_threads()
             for thread in threads:
-                hexId = "%x" % thread.unique_id
-                t = SubElement(root, 'thread', id=hexId, name=thread.name)
-                if self.report_core:
-                    t.set("core", str(self.core))
-                t.text = thread.description
+                parts.append('<thread id="%x" name=%s%s>%s</thread>' % (thread.unique_id,
+                    quoteattr(thread.name), core, xml_escape(thread.description or '')))
 
-        return b'<?xml version="1.0"?><!DOCTYPE feature SYSTEM "threads.dtd">' + tostring(root)
+        parts.append('</threads>')
+        return ''.join(parts).encode('ascii', 'xmlcharrefreplace')
 
     def is_threading_enabled(self):
         return (self.thread_provider is not None) and self.thread_provider.is_enabled \
@@ -1168,6 +1254,7 @@ class GDBServer(threading.Thread):
             # Invalidate threads list if flash is reprogrammed.
             LOG.debug("Received POST_RESET event")
             self.first_run_after_reset_or_flash = True
+            self._register_cache = None
             if self.thread_provider is not None:
                 self.thread_provider.read_from_target = False
 
@@ -16,9 +16,9 @@
 
 import logging
 import threading
+import select
 import socket
 import sys
-import six
 from six.moves import queue
 
 CTRL_C = b'\x03'
@@ -31,8 +31,55 @@ TRACE_ACK.setLevel(logging.CRITICAL)
 TRACE_PACKETS = LOG.getChild("trace.packet")
 TRACE_PACKETS.setLevel(logging.CRITICAL)
 
+## Maximum number of received packets waiting to be handled by the GDB server thread.
+#
+# When the queue is full the packet I/O thread stops reading from the socket, so TCP flow control
+# throttles gdb instead of received packets piling up in memory.
+RECEIVE_QUEUE_SIZE = 64
+
+## Maximum number of bytes read from the socket at once.
+READ_SIZE = 65536
+
+## Socket timeout, which applies to writes to the connection.
+SOCKET_TIMEOUT = 0.01
+
+## How long to wait for the connection to become readable if stop() can't wake the thread.
+POLL_TIMEOUT = 0.1
+
+## Two digit lowercase hex checksum strings, indexed by the checksum value.
+_CHECKSUM_HEX = [("%02x" % i).encode() for i in range(256)]
+
+## Packets at least this long are summed with numpy, if available. numpy's per-call overhead
+# makes it slower than summing a bytearray until packets reach roughly 450-500 bytes.
+_NUMPY_CHECKSUM_THRESHOLD = 512
+
+## The numpy module once _get_numpy() has tried to import it, or False if it is not installed.
+_numpy = None
+
+def _get_numpy():
+    """! @brief Import numpy the first time a large packet is checksummed.
+
+    numpy is only used for checksums, so importing it lazily keeps it off the load time of
+    every pyocd subcommand that imports the gdbserver.
+    """
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy
+
 def checksum(data):
-    return ("%02x" % (sum(six.iterbytes(data)) % 256)).encode()
+    if len(data) >= _NUMPY_CHECKSUM_THRESHOLD:
+        np = _get_numpy()
+        if np:
+            # Only the low byte of the sum is used, so a 32-bit accumulator that wraps is fine. It
+            # is no slower than a 64-bit one for small packets and faster from a few KiB up.
+            total = int(np.frombuffer(data, dtype=np.uint8).sum(dtype=np.uint32))
+            return _CHECKSUM_HEX[total & 0xff]
+    return _CHECKSUM_HEX[sum(bytearray(data)) & 0xff]
 
 class ConnectionClosedException(Exception):
     """! @brief Exception used to signal the GDB server connection closed."""
@@ -51,16 +98,25 @@ class GDBServerPacketIOThread(threading.Thread):
         super(GDBServerPacketIOThread, self).__init__()
         self.name = "gdb-packet-thread-port%d" % abstract_socket.port
         self._abstract_socket = abstract_socket
-        self._receive_queue = queue.Queue()
+        self._receive_queue = queue.Queue(maxsize=RECEIVE_QUEUE_SIZE)
         self._shutdown_event = threading.Event()
         self.interrupt_event = threading.Event()
         self.send_acks = True
         self._clear_send_acks = False
-        self._buffer = b''
+        self._buffer = bytearray()
+        self._read_view = memoryview(bytearray(READ_SIZE))
         self._expecting_ack = False
         self.drop_reply = False
         self._last_packet = b''
         self._closed = False
+
+        # A socket pair used by stop() to wake the thread from select(). socketpair() is not
+        # available on Windows under Python 2, in which case select() polls instead.
+        try:
+            self._wake_receiver, self._wake_sender = socket.socketpair()
+        except (AttributeError, socket.error):
+            self._wake_receiver = self._wake_sender = None
+
         self.setDaemon(True)
         self.start()
 
@@ -72,6 +128,12 @@ class GDBServerPacketIOThread(threading.Thread):
 
     def stop(self):
         self._shutdown_event.set()
+        if self._wake_sender is not None:
+            try:
+                self._wake_sender.send(b'\0')
+            except socket.error:
+                # The thread has already exited and closed the socket pair.
+                pass
 
     def send(self, packet):
         if self._closed or not packet:
@@ -83,7 +145,15 @@ class GDBServerPacketIOThread(threading.Thread):
             self.drop_reply = False
             LOG.debug("GDB dropped reply %s", packet)
 
-    def receive(self, block=True):
+    def receive(self, block=True, timeout=None):
+        """! @brief Get the next received packet.
+        
+        @param self
+        @param block If False, return None immediately if no packet is queued.
+        @param timeout If not None, the maximum time in seconds to wait for a packet when blocking.
+            None is returned if no packet arrives in time. Otherwise wait until a packet is
+            received or the connection is closed.
+        """
         if self._closed:
             raise ConnectionClosedException()
         while True:
@@ -91,10 +161,10 @@ class GDBServerPacketIOThread(threading.Thread):
                 # If block is false, we'll get an Empty exception immediately if there
                 # are no packets in the queue. Same if block is true and it times out
                 # waiting on an empty queue.
-                return self._receive_queue.get(block, 0.1)
+                return self._receive_queue.get(block, 0.1 if timeout is None else timeout)
             except queue.Empty:
-                # Only exit the loop if block is false or connection closed.
-                if not block:
+                # Only exit the loop if block is false, the timeout expired, or connection closed.
+                if not block or timeout is not None:
                     return None
                 if self._closed:
                     raise ConnectionClosedException()
@@ -102,22 +172,37 @@ class GDBServerPacketIOThread(threading.Thread):
     def run(self):
         LOG.debug("Starting GDB server packet I/O thread")
 
-        self._abstract_socket.set_timeout(0.01)
+        self._abstract_socket.set_timeout(SOCKET_TIMEOUT)
+
+        # Sleep in select() until there is data to read or stop() is called.
+        if self._wake_receiver is not None:
+            wait_list = [self._abstract_socket, self._wake_receiver]
+            wait_timeout = None
+        else:
+            wait_list = [self._abstract_socket]
+            wait_timeout = POLL_TIMEOUT
 
         while not self._shutdown_event.is_set():
             try:
-                data = self._abstract_socket.read()
+                readable, _, _ = select.select(wait_list, [], [], wait_timeout)
+                if self._abstract_socket not in readable:
+                    continue
+
+                # Read into a reused buffer so no new bytes object is allocated for each read.
+                length = self._abstract_socket.read_into(self._read_view)
 
                 # Handle closed connection
-                if len(data) == 0:
+                if length == 0:
                     LOG.debug("GDB packet thread: other side closed connection")
                     self._closed = True
                     break
 
-                TRACE_PACKETS.debug('-->>>> GDB read %d bytes: %s', len(data), data)
+                data = self._read_view[:length]
+                if TRACE_PACKETS.isEnabledFor(logging.DEBUG):
+                    TRACE_PACKETS.debug('-->>>> GDB read %d bytes: %s', length, data.tobytes())
 
                 self._buffer += data
-            except socket.error:
+            except (socket.error, select.error):
                 pass
 
             if self._shutdown_event.is_set():
@@ -125,27 +210,31 @@ class GDBServerPacketIOThread(threading.Thread):
 
             self._process_data()
 
+        if self._wake_receiver is not None:
+            self._wake_receiver.close()
+            self._wake_sender.close()
+
         LOG.debug("GDB packet thread stopping")
 
     def _write_packet(self, packet):
         TRACE_PACKETS.debug('--<<<< GDB send %d bytes: %s', len(packet), packet)
 
-        # Make sure the entire packet is sent.
-        remaining = len(packet)
-        while remaining:
-            written = self._abstract_socket.write(packet)
-            remaining -= written
-            if remaining:
-                packet = packet[written:]
+        # Make sure the entire packet is sent. A memoryview is used so that partial writes don't
+        # copy the unsent remainder of the packet.
+        data = memoryview(packet)
+        offset = 0
+        length = len(data)
+        while offset < length:
+            offset += self._abstract_socket.write(data[offset:])
 
         if self.send_acks:
             self._expecting_ack = True
 
     def _check_expected_ack(self):
         # Handle expected ack.
-        c = self._buffer[0:1]
+        c = bytes(self._buffer[0:1])
         if c in (b'+', b'-'):
-            self._buffer = self._buffer[1:]
+            del self._buffer[:1]
             TRACE_ACK.debug('got ack: %s', c)
             if c == b'-':
                 # Handle nack from gdb
@@ -169,27 +258,30 @@ class GDBServerPacketIOThread(threading.Thread):
             # Check for a ctrl-c.
             if len(self._buffer) and self._buffer[0:1] == CTRL_C:
                 self.interrupt_event.set()
-                self._buffer = self._buffer[1:]
+                del self._buffer[:1]
 
-            try:
-                # Look for complete packet and extract from buffer.
-                pkt_begin = self._buffer.index(b"$")
-                pkt_end = self._buffer.index(b"#") + 2
-                if pkt_begin >= 0 and pkt_end < len(self._buffer):
-                    pkt = self._buffer[pkt_begin:pkt_end + 1]
-                    self._buffer = self._buffer[pkt_end + 1:]
-                    self._handling_incoming_packet(pkt)
-                else:
-                    break
-            except ValueError:
-                # No complete packet received yet.
+            # Look for complete packet and extract from buffer. Stop if no complete packet has
+            # been received yet.
+            pkt_begin = self._buffer.find(b"$")
+            if pkt_begin == -1:
+                break
+            pkt_end = self._buffer.find(b"#", pkt_begin)
+            if pkt_end == -1:
                 break
+            pkt_end += 2
+            if pkt_end >= len(self._buffer):
+                break
+
+            pkt = bytes(self._buffer[pkt_begin:pkt_end + 1])
+            # Trim the consumed bytes in place rather than rebuilding the buffer.
+            del self._buffer[:pkt_end + 1]
+            self._handling_incoming_packet(pkt)
 
     def _handling_incoming_packet(self, packet):
-        # Compute checksum
-        data, cksum = packet[1:].split(b'#')
-        computedCksum = checksum(data)
-        goodPacket = (computedCksum.lower() == cksum.lower())
+        # Compute checksum. The packet is framed as $data#cc, so the checksum is the last two bytes.
+        # The data is viewed rather than sliced to avoid copying large packets.
+        computedCksum = checksum(memoryview(packet)[1:-3])
+        goodPacket = (computedCksum == packet[-2:].lower())
 
         if self.send_acks:
             ack = b'+' if goodPacket else b'-'
@@ -197,5 +289,11 @@ class GDBServerPacketIOThread(threading.Thread):
             TRACE_ACK.debug(ack)
 
         if goodPacket:
-            self._receive_queue.put(packet)
+            # Block while the queue is full, but give up if the thread is asked to stop.
+            while not self._shutdown_event.is_set():
+                try:
+                    self._receive_queue.put(packet, True, 0.1)
+                    break
+                except queue.Full:
+                    pass
 
@@ -19,6 +19,7 @@ import re
 import logging
 import time
 import collections
+import struct
 import six
 from .dap_settings import DAPSettings
 from .dap_access_api import DAPAccessIntf
@@ -44,6 +45,12 @@ WRITE = 0 << 1
 VALUE_MATCH = 1 << 4
 MATCH_MASK = 1 << 5
 
+# Port and register address bits of the transfer request for each register.
+_REG_REQUEST = {
+    reg: (DP_ACC if reg.value < 4 else AP_ACC) | ((reg.value % 4) << 2)
+    for reg in DAPAccessIntf.REG
+    }
+
 # SWO statuses.
 class SWOStatus:
     DISABLED = 1
@@ -56,6 +63,9 @@ LOG = logging.getLogger(__name__)
 TRACE = LOG.getChild("trace")
 TRACE.setLevel(logging.CRITICAL)
 
+## @brief Little-endian transfer data word.
+_U32LE = struct.Struct('<I')
+
 def _get_interfaces():
     """! @brief Get the connected USB devices"""
     # Get CMSIS-DAPv1 interfaces.
@@ -117,12 +127,7 @@ class _Transfer(object):
         that get_data_size returns.
         """
         assert len(data) == self._size_bytes
-        result = []
-        for i in range(0, self._size_bytes, 4):
-            word = ((data[0 + i] << 0) | (data[1 + i] << 8) |
-                    (data[2 + i] << 16) | (data[3 + i] << 24))
-            result.append(word)
-        self._result = result
+        self._result = list(struct.unpack_from('<%dI' % self.transfer_count, data))
 
     def add_error(self, error):
         """! @brief Attach an exception to this transfer rather than data.
@@ -301,14 +306,8 @@ class _Command(object):
                 buf[pos] = request
                 pos += 1
                 if not request & READ:
-                    buf[pos] = (write_list[write_pos] >> (8 * 0)) & 0xff
-                    pos += 1
-                    buf[pos] = (write_list[write_pos] >> (8 * 1)) & 0xff
-                    pos += 1
-                    buf[pos] = (write_list[write_pos] >> (8 * 2)) & 0xff
-                    pos += 1
-                    buf[pos] = (write_list[write_pos] >> (8 * 3)) & 0xff
-                    pos += 1
+                    _U32LE.pack_into(buf, pos, write_list[write_pos])
+                    pos += 4
                     write_pos += 1
         return buf
 
@@ -388,18 +387,10 @@ class _Command(object):
         for count, request, write_list in self._data:
             assert write_list is None or len(write_list) <= count
             assert request == self._block_request
-            write_pos = 0
             if not request & READ:
-                for _ in range(count):
-                    buf[pos] = (write_list[write_pos] >> (8 * 0)) & 0xff
-                    pos += 1
-                    buf[pos] = (write_list[write_pos] >> (8 * 1)) & 0xff
-                    pos += 1
-                    buf[pos] = (write_list[write_pos] >> (8 * 2)) & 0xff
-                    pos += 1
-                    buf[pos] = (write_list[write_pos] >> (8 * 3)) & 0xff
-                    pos += 1
-                    write_pos += 1
+                # Block transfer data is contiguous, so the whole run of words is packed at once.
+                struct.pack_into('<%dI' % count, buf, pos, *write_list[:count])
+                pos += 4 * count
         return buf
 
     def _decode_transfer_block_data(self, data):
@@ -552,6 +543,7 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
         self._commands_to_read = None
         self._command_response_buf = None
         self._swo_status = None
+        self._dap_info_cache = {}
 
     @property
     def vendor_name(self):
@@ -572,25 +564,26 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
 
         self._interface.open()
         self._protocol = CMSISDAPProtocol(self._interface)
+        self._dap_info_cache = {}
 
         if DAPSettings.limit_packets:
             self._packet_count = 1
             LOG.debug("Limiting packet count to %d", self._packet_count)
         else:
-            self._packet_count = self._protocol.dap_info(self.ID.MAX_PACKET_COUNT)
+            self._packet_count = self.identify(self.ID.MAX_PACKET_COUNT)
 
         # Log probe's firmware version.
-        fw_version = self._protocol.dap_info(self.ID.FW_VER)
+        fw_version = self.identify(self.ID.FW_VER)
         if fw_version:
             LOG.debug("CMSIS-DAP probe %s firmware version: %s", self._unique_id, fw_version)
 
         self._interface.set_packet_count(self._packet_count)
-        self._packet_size = self._protocol.dap_info(self.ID.MAX_PACKET_SIZE)
+        self._packet_size = self.identify(self.ID.MAX_PACKET_SIZE)
         self._interface.set_packet_size(self._packet_size)
-        self._capabilities = self._protocol.dap_info(self.ID.CAPABILITIES)
+        self._capabilities = self.identify(self.ID.CAPABILITIES)
         self._has_swo_uart = (self._capabilities & Capabilities.SWO_UART) != 0
         if self._has_swo_uart:
-            self._swo_buffer_size = self._protocol.dap_info(self.ID.SWO_BUFFER_SIZE)
+            self._swo_buffer_size = self.identify(self.ID.SWO_BUFFER_SIZE)
         else:
             self._swo_buffer_size = 0
         self._swo_status = SWOStatus.DISABLED
@@ -666,7 +659,12 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
 
     def identify(self, item):
         assert isinstance(item, DAPAccessIntf.ID)
-        return self._protocol.dap_info(item)
+        # DAP_Info values are fixed for a probe, so each one is read at most once per open.
+        try:
+            return self._dap_info_cache[item]
+        except KeyError:
+            value = self._dap_info_cache[item] = self._protocol.dap_info(item)
+            return value
 
     def vendor(self, index, data=None):
         if data is None:
@@ -784,25 +782,16 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
         assert isinstance(value, six.integer_types)
         assert isinstance(dap_index, six.integer_types)
 
-        request = WRITE
-        if reg_id.value < 4:
-            request |= DP_ACC
-        else:
-            request |= AP_ACC
-        request |= (reg_id.value % 4) * 4
-        self._write(dap_index, 1, request, [value])
+        request = WRITE | _REG_REQUEST[reg_id]
+        # Mask to 32 bits so values such as -1 are sent as their two's complement word.
+        self._write(dap_index, 1, request, [value & 0xffffffff])
 
     def read_reg(self, reg_id, dap_index=0, now=True):
         assert reg_id in self.REG
         assert isinstance(dap_index, six.integer_types)
         assert isinstance(now, bool)
 
-        request = READ
-        if reg_id.value < 4:
-            request |= DP_ACC
-        else:
-            request |= AP_ACC
-        request |= (reg_id.value % 4) << 2
+        request = READ | _REG_REQUEST[reg_id]
         transfer = self._write(dap_index, 1, request, None)
         assert transfer is not None
 
@@ -823,13 +812,8 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
         assert reg_id in self.REG
         assert isinstance(dap_index, six.integer_types)
 
-        request = WRITE
-        if reg_id.value < 4:
-            request |= DP_ACC
-        else:
-            request |= AP_ACC
-        request |= (reg_id.value % 4) * 4
-        self._write(dap_index, num_repeats, request, data_array)
+        request = WRITE | _REG_REQUEST[reg_id]
+        self._write(dap_index, num_repeats, request, [value & 0xffffffff for value in data_array])
 
     def reg_read_repeat(self, num_repeats, reg_id, dap_index=0,
                         now=True):
@@ -838,12 +822,7 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
         assert isinstance(dap_index, six.integer_types)
         assert isinstance(now, bool)
 
-        request = READ
-        if reg_id.value < 4:
-            request |= DP_ACC
-        else:
-            request |= AP_ACC
-        request |= (reg_id.value % 4) * 4
+        request = READ | _REG_REQUEST[reg_id]
         transfer = self._write(dap_index, num_repeats, request, None)
         assert transfer is not None
 
@@ -896,7 +875,6 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
             self._abort_all_transfers(exception)
             raise
 
-        decoded_data = bytearray(decoded_data)
         self._command_response_buf.extend(decoded_data)
 
         # Attach data to transfers
@@ -919,7 +897,7 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
 
         # Remove used data from _command_response_buf
         if pos > 0:
-            self._command_response_buf = self._command_response_buf[pos:]
+            del self._command_response_buf[:pos]
 
     def _send_packet(self):
         """! @brief Send a single packet to the interface
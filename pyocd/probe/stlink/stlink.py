@@ -55,6 +55,27 @@ class STLink(object):
     ## Port number to use to indicate DP registers.
     DP_PORT = 0xffff
 
+    ## Memory transfer command: command, memory command, address, length, AP.
+    _MEM_COMMAND = struct.Struct('<BBIHB')
+
+    ## SWD (frequency, divider) pairs, fastest first.
+    _SWD_FREQS = sorted(SWD_FREQ_MAP.items(), reverse=True)
+
+    ## JTAG (frequency, divider) pairs, fastest first.
+    _JTAG_FREQS = sorted(JTAG_FREQ_MAP.items(), reverse=True)
+
+    ## DAP register read command: command, JTAG_READ_DAP_REG, port, address.
+    _READ_DAP_REG_COMMAND = struct.Struct('<BBHH')
+
+    ## DAP register write command: command, JTAG_WRITE_DAP_REG, port, address, value.
+    _WRITE_DAP_REG_COMMAND = struct.Struct('<BBHHI')
+
+    ## Command to read the status of the last memory transfer.
+    _GET_RW_STATUS_COMMAND = bytearray([Commands.JTAG_COMMAND, Commands.JTAG_GETLASTRWSTATUS2])
+
+    ## Leading fields of the JTAG_GETLASTRWSTATUS2 response: status, unused, fault address.
+    _RW_STATUS = struct.Struct('<HHI')
+
     ## Map to convert from STLink error response codes to exception classes.
     _ERROR_CLASSES = {
         # AP protocol errors
@@ -198,7 +219,7 @@ class STLink(object):
             if self._hw_version >= 3:
                 self.set_com_frequency(self.Protocol.JTAG, freq)
             else:
-                for f, d in SWD_FREQ_MAP.items():
+                for f, d in self._SWD_FREQS:
                     if freq >= f:
                         response = self._device.transfer([Commands.JTAG_COMMAND, Commands.SWD_SET_FREQ, d], readSize=2)
                         self._check_status(response)
@@ -211,7 +232,7 @@ class STLink(object):
             if self._hw_version >= 3:
                 self.set_com_frequency(self.Protocol.JTAG, freq)
             else:
-                for f, d in JTAG_FREQ_MAP.items():
+                for f, d in self._JTAG_FREQS:
                     if freq >= f:
                         response = self._device.transfer([Commands.JTAG_COMMAND, Commands.JTAG_SET_FREQ, d], readSize=2)
                         self._check_status(response)
@@ -304,20 +325,22 @@ class STLink(object):
     
     def _read_mem(self, addr, size, memcmd, max, apsel):
         with self._lock:
-            result = []
+            result = bytearray(size)
+            offset = 0
+            cmd = bytearray(self._MEM_COMMAND.size)
             while size:
                 thisTransferSize = min(size, max)
             
-                cmd = [Commands.JTAG_COMMAND, memcmd]
-                cmd.extend(six.iterbytes(struct.pack('<IHB', addr, thisTransferSize, apsel)))
-                result += self._device.transfer(cmd, readSize=thisTransferSize)
+                self._MEM_COMMAND.pack_into(cmd, 0, Commands.JTAG_COMMAND, memcmd, addr, thisTransferSize, apsel)
+                result[offset:offset + thisTransferSize] = self._device.transfer(cmd, readSize=thisTransferSize)
+                offset += thisTransferSize
             
                 addr += thisTransferSize
                 size -= thisTransferSize
             
                 # Check status of this read.
-                response = self._device.transfer([Commands.JTAG_COMMAND, Commands.JTAG_GETLASTRWSTATUS2], readSize=12)
-                status, _, faultAddr = struct.unpack('<HHI', response[0:8])
+                response = self._device.transfer(self._GET_RW_STATUS_COMMAND, readSize=12)
+                status, _, faultAddr = self._RW_STATUS.unpack_from(response)
 
                 # Handle transfer faults specially so we can assign the address info.
                 if status != Status.JTAG_OK:
@@ -338,20 +361,20 @@ class STLink(object):
 
     def _write_mem(self, addr, data, memcmd, max, apsel):
         with self._lock:
+            cmd = bytearray(self._MEM_COMMAND.size)
             while len(data):
                 thisTransferSize = min(len(data), max)
                 thisTransferData = data[:thisTransferSize]
             
-                cmd = [Commands.JTAG_COMMAND, memcmd]
-                cmd.extend(six.iterbytes(struct.pack('<IHB', addr, thisTransferSize, apsel)))
+                self._MEM_COMMAND.pack_into(cmd, 0, Commands.JTAG_COMMAND, memcmd, addr, thisTransferSize, apsel)
                 self._device.transfer(cmd, writeData=thisTransferData)
             
                 addr += thisTransferSize
                 data = data[thisTransferSize:]
             
                 # Check status of this write.
-                response = self._device.transfer([Commands.JTAG_COMMAND, Commands.JTAG_GETLASTRWSTATUS2], readSize=12)
-                status, _, faultAddr = struct.unpack('<HHI', response[0:8])
+                response = self._device.transfer(self._GET_RW_STATUS_COMMAND, readSize=12)
+                status, _, faultAddr = self._RW_STATUS.unpack_from(response)
                 
                 # Handle transfer faults specially so we can assign the address info.
                 if status != Status.JTAG_OK:
@@ -407,11 +430,10 @@ class STLink(object):
         assert (addr >> 16) == 0, "register address must be 16-bit"
         
         with self._lock:
-            cmd = [Commands.JTAG_COMMAND, Commands.JTAG_READ_DAP_REG]
-            cmd.extend(six.iterbytes(struct.pack('<HH', port, addr)))
+            cmd = self._READ_DAP_REG_COMMAND.pack(Commands.JTAG_COMMAND, Commands.JTAG_READ_DAP_REG, port, addr)
             response = self._device.transfer(cmd, readSize=8)
             self._check_status(response[:2])
-            value, = struct.unpack('<I', response[4:8])
+            value, = struct.unpack_from('<I', response, 4)
             return value
     
     def write_dap_register(self, port, addr, value):
@@ -419,8 +441,8 @@ class STLink(object):
         assert (addr >> 16) == 0, "register address must be 16-bit"
 
         with self._lock:
-            cmd = [Commands.JTAG_COMMAND, Commands.JTAG_WRITE_DAP_REG]
-            cmd.extend(six.iterbytes(struct.pack('<HHI', port, addr, value)))
+            cmd = self._WRITE_DAP_REG_COMMAND.pack(Commands.JTAG_COMMAND, Commands.JTAG_WRITE_DAP_REG,
+                port, addr, value)
             response = self._device.transfer(cmd, readSize=2)
             self._check_status(response)
 
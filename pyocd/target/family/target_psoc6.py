@@ -38,7 +38,7 @@ class CortexM_PSoC6(CortexM):
             sleep(0.5)
             self._ap.dp.init()
             self._ap.dp.power_up_debug()
-            self.fpb.enable()
+            self.fpb.enable(force=True)
         else:
             if reset_type is Target.ResetType.SW_VECTRESET:
                 mask = CortexM.NVIC_AIRCR_VECTRESET
@@ -182,7 +182,7 @@ class CortexM_PSoC64(CortexM):
         if reset_type is Target.ResetType.HW:
             self.session.probe.reset()
             self.reinit_dap()
-            self.fpb.enable()
+            self.fpb.enable(force=True)
 
         else:
             if reset_type is Target.ResetType.SW_VECTRESET:
@@ -14,8 +14,56 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import struct
+
 from . import events
 
+# Packet kinds identified by the header byte.
+_SYNC = 0
+_OVERFLOW = 1
+_LOCAL_TIMESTAMP = 2
+_GLOBAL_TIMESTAMP = 3
+_EXTENSION = 4
+_RESERVED = 5
+_INSTRUMENTATION = 6
+_HARDWARE = 7
+
+def _classify_header(hdr):
+    """! @brief Determine the kind of packet started by a header byte."""
+    if hdr == 0:
+        return _SYNC
+    elif hdr == 0x70:
+        return _OVERFLOW
+    # Protocol packets.
+    elif (hdr & 0x3) == 0:
+        d = (hdr >> 4) & 0b111
+        if (hdr & 0xf) == 0 and d not in (0x0, 0x3):
+            return _LOCAL_TIMESTAMP
+        elif hdr in (0b10010100, 0b10110100):
+            return _GLOBAL_TIMESTAMP
+        elif (hdr & 0x8) == 0x8:
+            return _EXTENSION
+        else:
+            return _RESERVED
+    # Source packets.
+    elif (hdr & 0x4) == 0:
+        return _INSTRUMENTATION
+    else:
+        return _HARDWARE
+
+## Packet kind for each header byte value, so the parser does a single lookup per packet.
+_HEADER_KINDS = [_classify_header(hdr) for hdr in range(256)]
+
+## Payload length in bytes for each source packet header, or 0 for other headers.
+_SOURCE_LENGTHS = [(1 << ((hdr & 0x3) - 1)) if _HEADER_KINDS[hdr] >= _INSTRUMENTATION else 0
+                    for hdr in range(256)]
+
+## Source address (ITM port or hardware packet discriminator) for each header byte value.
+_SOURCE_ADDRESSES = [(hdr >> 3) & 0x1f for hdr in range(256)]
+
+_U16LE = struct.Struct('<H')
+_U32LE = struct.Struct('<I')
+
 class SWOParser(object):
     """! @brief SWO data stream parser.
     
@@ -39,9 +87,8 @@ class SWOParser(object):
         self._pending_events = []
         self._pending_data_trace = None
         
-        # Get generator instance and prime it.
-        self._parser = self._parse()
-        next(self._parser)
+        # Bytes of an incomplete packet left over from the previous call to parse().
+        self._partial = bytearray()
     
     def connect(self, sink):
         """! @brief Connect the downstream trace sink or filter."""
@@ -63,9 +110,19 @@ class SWOParser(object):
         @param self
         @param data A sequence of integer byte values, usually a bytearray.
         """
-        for value in data:
-            self._parser.send(value)
-            self._bytes_parsed += 1
+        if self._partial:
+            buf = self._partial + bytearray(data)
+        elif isinstance(data, bytearray):
+            # Probes normally return a bytearray, which can be parsed without a copy.
+            buf = data
+        else:
+            buf = bytearray(data)
+        consumed = self._parse(buf)
+        if consumed == len(buf):
+            self._partial = bytearray()
+        else:
+            self._partial = buf[consumed:]
+        self._bytes_parsed += len(data)
     
     def _flush_events(self):
         """! @brief Send all pending events to event sink."""
@@ -131,143 +188,147 @@ class SWOParser(object):
         if flush:
             self._flush_events()
     
-    def _parse(self):
-        """! @brief SWO parser as generator function coroutine.
+    def _parse(self, buf):
+        """! @brief Parse all complete packets in a buffer.
         
-        The generator yields every time it needs a byte of SWO data. The caller must use the
-        generator's send() method to provide the next byte.
+        Packets are decoded directly from the buffer, with multi-byte payloads unpacked with a
+        single struct call. Parsing stops at the first packet that is not complete in the buffer.
+        
+        @param self
+        @param buf bytearray of SWO data.
+        @return Number of bytes consumed from the start of _buf_.
         """
-        timestamp = 0
-        invalid = False
-        while True:
-            byte = yield
-            hdr = byte
+        kinds = _HEADER_KINDS
+        source_lengths = _SOURCE_LENGTHS
+        source_addresses = _SOURCE_ADDRESSES
+        unpack16 = _U16LE.unpack_from
+        unpack32 = _U32LE.unpack_from
+        parse_source_packet = self._parse_source_packet
+        end = len(buf)
+        pos = 0
+        while pos < end:
+            hdr = buf[pos]
+            kind = kinds[hdr]
             
-            # Sync packet.
-            if hdr == 0:
-                packets = 0
-                while True:
-                    # Check for final 1 bit after at least 5 all-zero sync packets
-                    if (packets >= 5) and (byte == 0x80):
-                        break
-                    elif byte == 0:
-                        packets += 1
-                    else:
-                        # Get early non-zero packet, reset sync packet counter.
-                        #packets = 0
-                        invalid = True
-                        break
-                    byte = yield
-                self._itm_page = 0
-            # Overflow packet.
-            elif hdr == 0x70:
-                self._send_event(events.TraceOverflow(timestamp))
-            # Protocol packet.
-            elif (hdr & 0x3) == 0:
-                c = (hdr >> 7) & 0x1
-                d = (hdr >> 4) & 0b111
-                # Local timestamp.
-                if (hdr & 0xf) == 0 and d not in (0x0, 0x3):
-                    ts = 0
-                    tc = 0
-                    # Local timestamp packet format 1.
-                    if c == 1:
-                        tc = (hdr >> 4) & 0x3
-                        while c == 1:
-                            byte = yield
-                            ts = (ts << 7) | (byte & 0x7f)
-                            c = (byte >> 7) & 0x1
-                    # Local timestamp packet format 2.
-                    else:
-                        ts = (hdr >> 4) & 0x7
-                    timestamp += ts
-                    self._send_event(events.TraceTimestamp(tc, timestamp))
-                # Global timestamp.
-                elif hdr in (0b10010100, 0b10110100):
-                    t = (hdr >> 5) & 0x1
-                    # TODO handle global timestamp
-                # Extension.
-                elif (hdr & 0x8) == 0x8:
-                    sh = (hdr >> 2) & 0x1
-                    if c == 0:
-                        ex = (hdr >> 4) & 0x7
-                    else:
-                        ex = 0
-                        while c == 1:
-                            byte = yield
-                            ex = (ex << 7) | (byte & 0x7f)
-                            c = (byte >> 7) & 0x1
-                    if sh == 0:
-                        # Extension packet with sh==0 sets ITM stimulus page.
-                        self._itm_page = ex
-                    else:
-                        #self._send_event(events.TraceEvent("Extension: SH={:d} EX={:#x}\n".format(sh, ex), timestamp))
-                        invalid = True
-                # Reserved packet.
-                else:
-                    invalid = True
             # Source packet.
-            else:
-                ss = hdr & 0x3
-                l = 1 << (ss - 1)
-                a = (hdr >> 3) & 0x1f
+            if kind >= _INSTRUMENTATION:
+                l = source_lengths[hdr]
+                next_pos = pos + 1 + l
+                if next_pos > end:
+                    break
                 if l == 1:
-                    payload = yield
+                    payload = buf[pos + 1]
                 elif l == 2:
-                    byte1 = yield
-                    byte2 = yield
-                    payload = (byte1 | 
-                                (byte2 << 8))
+                    payload = unpack16(buf, pos + 1)[0]
                 else:
-                    byte1 = yield
-                    byte2 = yield
-                    byte3 = yield
-                    byte4 = yield
-                    payload = (byte1 | 
-                                (byte2 << 8) |
-                                (byte3 << 16) |
-                                (byte4 << 24))
-                
-                # Instrumentation packet.
-                if (hdr & 0x4) == 0:
-                    port = (self._itm_page * 32) + a
-                    self._send_event(events.TraceITMEvent(port, payload, l, timestamp))
-                # Hardware source packets...
-                # Event counter
-                elif a == 0:
-                    self._send_event(events.TraceEventCounter(payload, timestamp))
-                # Exception trace
-                elif a == 1:
-                    exceptionNumber = payload & 0x1ff
-                    exceptionName = self._core.exception_number_to_name(exceptionNumber, True)
-                    fn = (payload >> 12) & 0x3
-                    if 1 <= fn <= 3:
-                        self._send_event(events.TraceExceptionEvent(exceptionNumber, exceptionName, fn, timestamp))
-                    else:
-                        invalid = True
-                # Periodic PC
-                elif a == 2:                        
-                    # A payload of 0 indicates a period PC sleep event.
-                    self._send_event(events.TracePeriodicPC(payload, timestamp))
-                # Data trace
-                elif 8 <= a <= 23:
-                    type = (hdr >> 6) & 0x3
-                    cmpn = (hdr >> 4) & 0x3
-                    bit3 = (hdr >> 3) & 0x1
-                    # PC value
-                    if type == 0b01 and bit3 == 0:
-                        self._send_event(events.TraceDataTraceEvent(cmpn=cmpn, pc=payload, ts=timestamp))
-                    # Address
-                    elif type == 0b01 and bit3 == 1:
-                        self._send_event(events.TraceDataTraceEvent(cmpn=cmpn, addr=payload, ts=timestamp))
-                    # Data value
-                    elif type == 0b10:
-                        self._send_event(events.TraceDataTraceEvent(cmpn=cmpn, value=payload, rnw=(bit3 == 0), sz=l, ts=timestamp))
-                    else:
-                        invalid = True
-                # Invalid DWT 'a' value.
+                    payload = unpack32(buf, pos + 1)[0]
+                parse_source_packet(kind, hdr, source_addresses[hdr], l, payload)
+            # Sync packet: a run of zero bytes terminated by a non-zero byte. A valid sync has at
+            # least 5 zero bytes followed by 0x80, but the ITM page is reset either way.
+            elif kind == _SYNC:
+                next_pos = pos + 1
+                while next_pos < end and buf[next_pos] == 0:
+                    next_pos += 1
+                if next_pos == end:
+                    break
+                next_pos += 1
+                self._itm_page = 0
+            # Overflow packet.
+            elif kind == _OVERFLOW:
+                next_pos = pos + 1
+                self._send_event(events.TraceOverflow(self._timestamp))
+            # Local timestamp.
+            elif kind == _LOCAL_TIMESTAMP:
+                tc = 0
+                # Local timestamp packet format 1.
+                if hdr & 0x80:
+                    next_pos = self._find_continuation_end(buf, pos)
+                    if next_pos is None:
+                        break
+                    tc = (hdr >> 4) & 0x3
+                    ts = self._decode_continuation(buf, pos, next_pos)
+                # Local timestamp packet format 2.
                 else:
-                    invalid = True
-        
+                    next_pos = pos + 1
+                    ts = (hdr >> 4) & 0x7
+                self._timestamp += ts
+                self._send_event(events.TraceTimestamp(tc, self._timestamp))
+            # Extension.
+            elif kind == _EXTENSION:
+                if hdr & 0x80:
+                    next_pos = self._find_continuation_end(buf, pos)
+                    if next_pos is None:
+                        break
+                    ex = self._decode_continuation(buf, pos, next_pos)
+                else:
+                    next_pos = pos + 1
+                    ex = (hdr >> 4) & 0x7
+                # Extension packet with sh==0 sets ITM stimulus page. Others are ignored.
+                if (hdr & 0x4) == 0:
+                    self._itm_page = ex
+            # Global timestamp packets are not handled, and reserved packets are invalid.
+            else:
+                next_pos = pos + 1
+            
+            pos = next_pos
+        return pos
 
+    @staticmethod
+    def _find_continuation_end(buf, pos):
+        """! @brief Find the end of a packet whose bytes after the header have a continuation bit.
+        @return Offset just past the last byte of the packet, or None if the packet is incomplete.
+        """
+        end = len(buf)
+        i = pos + 1
+        while i < end and (buf[i] & 0x80):
+            i += 1
+        if i == end:
+            return None
+        return i + 1
+
+    @staticmethod
+    def _decode_continuation(buf, pos, next_pos):
+        """! @brief Combine the 7-bit fields of the bytes following a packet header."""
+        value = 0
+        for i in range(pos + 1, next_pos):
+            value = (value << 7) | (buf[i] & 0x7f)
+        return value
 
+    def _parse_source_packet(self, kind, hdr, a, l, payload):
+        """! @brief Generate an event for a decoded source packet."""
+        timestamp = self._timestamp
+        
+        # Instrumentation packet.
+        if kind == _INSTRUMENTATION:
+            port = (self._itm_page * 32) + a
+            self._send_event(events.TraceITMEvent(port, payload, l, timestamp))
+        # Hardware source packets...
+        # Event counter
+        elif a == 0:
+            self._send_event(events.TraceEventCounter(payload, timestamp))
+        # Exception trace
+        elif a == 1:
+            exceptionNumber = payload & 0x1ff
+            exceptionName = self._core.exception_number_to_name(exceptionNumber, True)
+            fn = (payload >> 12) & 0x3
+            if 1 <= fn <= 3:
+                self._send_event(events.TraceExceptionEvent(exceptionNumber, exceptionName, fn, timestamp))
+        # Periodic PC
+        elif a == 2:
+            # A payload of 0 indicates a period PC sleep event.
+            self._send_event(events.TracePeriodicPC(payload, timestamp))
+        # Data trace
+        elif 8 <= a <= 23:
+            type = (hdr >> 6) & 0x3
+            cmpn = (hdr >> 4) & 0x3
+            bit3 = (hdr >> 3) & 0x1
+            # PC value
+            if type == 0b01 and bit3 == 0:
+                self._send_event(events.TraceDataTraceEvent(cmpn=cmpn, pc=payload, ts=timestamp))
+            # Address
+            elif type == 0b01 and bit3 == 1:
+                self._send_event(events.TraceDataTraceEvent(cmpn=cmpn, addr=payload, ts=timestamp))
+            # Data value
+            elif type == 0b10:
+                self._send_event(events.TraceDataTraceEvent(cmpn=cmpn, value=payload, rnw=(bit3 == 0), sz=l, ts=timestamp))
+        # Other 'a' values are invalid and ignored.
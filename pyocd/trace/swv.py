@@ -28,6 +28,12 @@ from ..core.target import Target
 
 LOG = logging.getLogger(__name__)
 
+## Single-character strings for every byte value, indexed by the byte.
+_CHARS = [chr(i) for i in range(256)]
+
+## Shifts used to extract the bytes of a 32-bit ITM event in little endian order.
+_WORD_SHIFTS = (0, 8, 16, 24)
+
 class SWVEventSink(TraceEventSink):
     """! @brief Trace event sink that converts ITM packets to a text stream."""
     
@@ -52,15 +58,14 @@ class SWVEventSink(TraceEventSink):
             return
         
         # Extract bytes.
-        if event.width == 1:
-            data = chr(event.data)
-        elif event.width == 2:
-            data = chr(event.data & 0xff) + chr((event.data >> 8) & 0xff)
-        elif event.width == 4:
-            data = (chr(event.data & 0xff)
-                    + chr((event.data >> 8) & 0xff)
-                    + chr((event.data >> 16) & 0xff)
-                    + chr((event.data >> 24) & 0xff))
+        value = event.data
+        width = event.width
+        if width == 1:
+            data = _CHARS[value & 0xff]
+        elif width == 2:
+            data = _CHARS[value & 0xff] + _CHARS[(value >> 8) & 0xff]
+        else:
+            data = "".join(_CHARS[(value >> shift) & 0xff] for shift in _WORD_SHIFTS)
 
         self._console.write(data)
 
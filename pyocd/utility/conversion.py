@@ -19,6 +19,19 @@ import binascii
 from itertools import tee
 import six
 from six.moves import zip
+from .compatibility import to_str_safe
+
+# Precompiled structs for the scalar conversions below.
+_U32BE = struct.Struct(">I")
+_U32LE = struct.Struct("<I")
+_U64LE = struct.Struct("<Q")
+_F32BE = struct.Struct(">f")
+_U64BE = struct.Struct(">Q")
+_F64BE = struct.Struct(">d")
+
+# Halfword lists at least this long are converted with a single struct call. Shorter lists, which
+# is the common single halfword case, are faster with a plain loop.
+_U16_STRUCT_THRESHOLD = 32
 
 def byte_list_to_u32le_list(data, pad=0x00):
     """! @brief Convert a list of bytes to a list of 32-bit integers (little endian)
@@ -50,6 +63,8 @@ def u32le_list_to_byte_list(data):
 
 def u16le_list_to_byte_list(data):
     """! @brief Convert a halfword array into a byte array"""
+    if len(data) >= _U16_STRUCT_THRESHOLD:
+        return list(bytearray(struct.pack('<%dH' % len(data), *(h & 0xffff for h in data))))
     byteData = []
     for h in data:
         byteData.extend([h & 0xff, (h >> 8) & 0xff])
@@ -57,6 +72,10 @@ def u16le_list_to_byte_list(data):
 
 def byte_list_to_u16le_list(byteData):
     """! @brief Convert a byte array into a halfword array"""
+    if len(byteData) & 1:
+        raise ValueError("byte array length %d is not a multiple of 2" % len(byteData))
+    if len(byteData) >= 2 * _U16_STRUCT_THRESHOLD:
+        return list(struct.unpack('<%dH' % (len(byteData) // 2), bytearray(byteData)))
     data = []
     for i in range(0, len(byteData), 2):
         data.append(byteData[i] | (byteData[i + 1] << 8))
@@ -64,45 +83,27 @@ def byte_list_to_u16le_list(byteData):
 
 def u32_to_float32(data):
     """! @brief Convert a 32-bit int to an IEEE754 float"""
-    d = struct.pack(">I", data)
-    return struct.unpack(">f", d)[0]
+    return _F32BE.unpack(_U32BE.pack(data))[0]
 
 def float32_to_u32(data):
     """! @brief Convert an IEEE754 float to a 32-bit int"""
-    d = struct.pack(">f", data)
-    return struct.unpack(">I", d)[0]
+    return _U32BE.unpack(_F32BE.pack(data))[0]
 
 def u64_to_float64(data):
     """! @brief Convert a 64-bit int to an IEEE754 float"""
-    d = struct.pack(">Q", data)
-    return struct.unpack(">d", d)[0]
+    return _F64BE.unpack(_U64BE.pack(data))[0]
 
 def float64_to_u64(data):
     """! @brief Convert an IEEE754 float to a 64-bit int"""
-    d = struct.pack(">d", data)
-    return struct.unpack(">Q", d)[0]
+    return _U64BE.unpack(_F64BE.pack(data))[0]
 
 def u32_to_hex8le(val):
     """! @brief Create 8-digit hexadecimal string from 32-bit register value"""
-    return ''.join("%02x" % (x & 0xFF) for x in (
-        val,
-        val >> 8,
-        val >> 16,
-        val >> 24,
-    ))
+    return to_str_safe(binascii.hexlify(_U32LE.pack(val & 0xFFFFFFFF)))
 
 def u64_to_hex16le(val):
     """! @brief Create 16-digit hexadecimal string from 64-bit register value"""
-    return ''.join("%02x" % (x & 0xFF) for x in (
-        val,
-        val >> 8,
-        val >> 16,
-        val >> 24,
-        val >> 32,
-        val >> 40,
-        val >> 48,
-        val >> 56,
-    ))
+    return to_str_safe(binascii.hexlify(_U64LE.pack(val & 0xFFFFFFFFFFFFFFFF)))
 
 def hex8_to_u32be(data):
     """! @brief Build 32-bit register value from big-endian 8-digit hexadecimal string"""
@@ -83,11 +83,24 @@ class ProgressReportTTY(ProgressReport):
 
     ## These width constants can't be changed yet without changing the code below to match.
     WIDTH = 20
+    BAR = '=' * WIDTH
+
+    ## Bar length and percentage shown by the last redraw, or None if nothing has been drawn yet.
+    _last_drawn = None
+
+    def _start(self):
+        super(ProgressReportTTY, self)._start()
+        self._last_drawn = None
     
     def _update(self, progress):
-        self._file.write('\r')
+        # Only redraw when the displayed bar or percentage changes.
         i = int(progress * self.WIDTH)
-        self._file.write("[%-20s] %3d%%" % ('=' * i, round(progress * 100)))
+        percent = int(round(progress * 100))
+        if (i, percent) == self._last_drawn:
+            return
+        self._last_drawn = (i, percent)
+
+        self._file.write("\r[%-20s] %3d%%" % (self.BAR[:i], percent))
         self._file.flush()
 
     def _finish(self):
@@ -114,6 +127,8 @@ class ProgressReportNoTTY(ProgressReport):
     def _update(self, progress):
         i = int(progress * self.WIDTH)
         delta = i - self.last
+        if delta <= 0:
+            return
         self._file.write('=' * delta)
         self._file.flush()
         self.last = i
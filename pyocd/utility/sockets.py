@@ -54,9 +54,15 @@ class ListenerSocket(object):
             packet_size = self.packet_size
         return self.conn.recv(packet_size)
 
+    def read_into(self, buffer):
+        return self.conn.recv_into(buffer)
+
     def write(self, data):
         return self.conn.send(data)
 
+    def fileno(self):
+        return self.conn.fileno()
+
     def close(self):
         return_value = None
         if self.conn is not None:
@@ -0,0 +1,239 @@
+# pyOCD debugger
+# Copyright (c) 2020 Arm Limited
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from pyocd.core.target import Target
+from pyocd.core import memory_map
+from pyocd.coresight.fpb import FPB
+from pyocd.debug.breakpoints.manager import BreakpointManager
+from pyocd.debug.breakpoints.software import SoftwareBreakpointProvider
+from pyocd.utility.notification import Notifier
+
+RAM_START = 0x20000000
+
+class BreakpointMockCore(object):
+    """! @brief Minimal core with halfword-addressable RAM for breakpoint tests."""
+    def __init__(self):
+        self.session = Notifier()
+        self.memory_map = memory_map.MemoryMap(
+            memory_map.FlashRegion(start=0, length=0x1000, blocksize=0x400, name='flash'),
+            memory_map.RamRegion(start=RAM_START, length=0x1000, name='ram')
+            )
+        self.ram = {}
+        self.read_count = 0
+
+    def read16(self, addr, now=True):
+        self.read_count += 1
+        value = self.ram.get(addr, addr & 0xffff)
+        if now:
+            return value
+        else:
+            return lambda: value
+
+    def write16(self, addr, value):
+        self.ram[addr] = value
+
+FPB_BASE = 0xe0002000
+
+class FPBMockAP(object):
+    """! @brief AP that records FPB register writes."""
+    def __init__(self, num_comp=4):
+        self.regs = {FPB_BASE: (num_comp << 4)}
+        self.write_count = 0
+
+    def read32(self, addr, now=True):
+        return self.regs.get(addr, 0)
+
+    def read_memory_block32(self, addr, size):
+        return [self.regs.get(addr + offset * 4, 0) for offset in range(size)]
+
+    def write32(self, addr, value):
+        self.write_count += 1
+        self.regs[addr] = value
+
+    write_memory = write32
+
+    def write_memory_block32(self, addr, data):
+        self.write_count += 1
+        for offset, value in enumerate(data):
+            self.regs[addr + offset * 4] = value
+
+@pytest.fixture(scope='function')
+def fpb():
+    unit = FPB(FPBMockAP(), addr=FPB_BASE)
+    unit.init()
+    return unit
+
+@pytest.fixture(scope='function')
+def bpcore():
+    return BreakpointMockCore()
+
+@pytest.fixture(scope='function')
+def bpmgr(bpcore):
+    mgr = BreakpointManager(bpcore)
+    mgr.add_provider(SoftwareBreakpointProvider(bpcore))
+    return mgr
+
+class TestBreakpointManager:
+    def test_set_sw(self, bpcore, bpmgr):
+        addrs = [RAM_START + 0x10, RAM_START + 0x12, RAM_START + 0x40]
+        for addr in addrs:
+            assert bpmgr.set_breakpoint(addr)
+        # Nothing is written until flush.
+        assert bpcore.ram == {}
+        bpmgr.flush()
+        for addr in addrs:
+            assert bpcore.ram[addr] == SoftwareBreakpointProvider.BKPT_INSTR
+            bp = bpmgr.find_breakpoint(addr)
+            assert bp is not None
+            assert bp.type == Target.BreakpointType.SW
+            assert bp.original_instr == addr & 0xffff
+        assert sorted(bpmgr.get_breakpoints()) == addrs
+
+    def test_remove_sw(self, bpcore, bpmgr):
+        addr = RAM_START + 0x20
+        bpmgr.set_breakpoint(addr)
+        bpmgr.flush()
+        bpmgr.remove_breakpoint(addr)
+        bpmgr.flush()
+        assert bpcore.ram[addr] == addr & 0xffff
+        assert bpmgr.find_breakpoint(addr) is None
+        assert list(bpmgr.get_breakpoints()) == []
+
+    def test_remove_several(self, bpcore, bpmgr):
+        addrs = [RAM_START + 0x10, RAM_START + 0x20, RAM_START + 0x30]
+        for addr in addrs:
+            bpmgr.set_breakpoint(addr)
+        bpmgr.flush()
+        for addr in addrs[:2]:
+            bpmgr.remove_breakpoint(addr)
+        bpmgr.flush()
+        for addr in addrs[:2]:
+            assert bpcore.ram[addr] == addr & 0xffff
+        assert list(bpmgr.get_breakpoints()) == addrs[2:]
+        bpmgr.remove_all_breakpoints()
+        assert bpcore.ram[addrs[2]] == addrs[2] & 0xffff
+        assert list(bpmgr.get_breakpoints()) == []
+
+    def test_pending_changes(self, bpcore, bpmgr):
+        addr1 = RAM_START + 0x10
+        addr2 = RAM_START + 0x20
+        bpmgr.set_breakpoint(addr1)
+        bpmgr.flush()
+        bpmgr.set_breakpoint(addr2)
+        bpmgr.remove_breakpoint(addr1)
+        # Live breakpoints are unchanged until the next flush.
+        assert list(bpmgr.get_breakpoints()) == [addr1]
+        assert bpmgr.find_breakpoint(addr1) is None
+        assert bpmgr.find_breakpoint(addr2) is not None
+        bpmgr.flush()
+        assert list(bpmgr.get_breakpoints()) == [addr2]
+        assert bpcore.ram[addr1] == addr1 & 0xffff
+
+    def test_flush_unchanged(self, bpcore, bpmgr):
+        addr = RAM_START + 0x30
+        bpmgr.set_breakpoint(addr)
+        bpmgr.flush()
+        count = bpcore.read_count
+        bpmgr.flush()
+        assert bpcore.read_count == count
+        assert bpmgr.find_breakpoint(addr) is not None
+
+    def test_flush_cancelled_changes(self, bpcore, bpmgr):
+        addr = RAM_START + 0x30
+        bpmgr.set_breakpoint(addr)
+        bpmgr.remove_breakpoint(addr)
+        bpmgr.flush()
+        assert bpcore.read_count == 0
+        assert bpcore.ram == {}
+        assert bpmgr._updated_breakpoints is bpmgr._breakpoints
+
+    def test_filter_block(self, bpcore, bpmgr):
+        addrs = [RAM_START + 0x10, RAM_START + 0x16, RAM_START + 0x20]
+        for addr in addrs:
+            bpmgr.set_breakpoint(addr)
+        bpmgr.flush()
+
+        # The mock core's original instruction at each address is addr & 0xffff.
+        # Bytes, including a breakpoint straddling the start of the block.
+        data = bpmgr.filter_memory_unaligned_8(RAM_START + 0x11, 0x10, [0xaa] * 0x10)
+        assert data[0] == 0x00
+        assert data[5:7] == [0x16, 0x00]
+        assert data[0xf] == 0x20
+        assert data.count(0xaa) == 0x10 - 4
+
+        # Words.
+        data = bpmgr.filter_memory_aligned_32(RAM_START + 0x10, 4, [0xbe00be00] * 4)
+        assert data == [0xbe000010, 0x0016be00, 0xbe00be00, 0xbe00be00]
+
+        # Removed breakpoints are no longer filtered.
+        bpmgr.remove_breakpoint(RAM_START + 0x16)
+        bpmgr.flush()
+        assert bpmgr.filter_memory(RAM_START + 0x14, 32, 0xbe00be00) == 0xbe00be00
+        assert bpmgr.filter_memory(RAM_START + 0x20, 16, 0xbe00) == 0x20
+
+    def test_flash_without_fpb(self, bpmgr):
+        assert not bpmgr.set_breakpoint(0x100)
+
+class TestFPB:
+    def test_init(self, fpb):
+        assert fpb.nb_code == 4
+        assert fpb.available_breakpoints == 4
+        assert not fpb.enabled
+        # Only FP_CTRL is written because all comparators were already disabled.
+        assert fpb.ap.write_count == 1
+
+    def test_init_clears_comparators(self):
+        ap = FPBMockAP()
+        ap.regs[FPB_BASE + FPB.FP_COMP0 + 4] = 0x1001
+        unit = FPB(ap, addr=FPB_BASE)
+        unit.init()
+        # FP_CTRL disable plus one block write to clear the comparators.
+        assert ap.write_count == 2
+        for bp in unit.hw_breakpoints:
+            assert ap.regs[bp.comp_register_addr] == 0
+
+    def test_set_remove(self, fpb):
+        bps = [fpb.set_breakpoint(addr) for addr in (0x100, 0x202, 0x300, 0x400)]
+        assert all(bp is not None for bp in bps)
+        assert fpb.available_breakpoints == 0
+        assert fpb.ap.regs[FPB_BASE + FPB.FP_COMP0] == 0x100 | (1 << 30) | 1
+        assert fpb.ap.regs[FPB_BASE + FPB.FP_COMP0 + 4] == 0x200 | (2 << 30) | 1
+        assert fpb.set_breakpoint(0x500) is None
+
+        fpb.remove_breakpoint(bps[1])
+        assert fpb.available_breakpoints == 1
+        assert fpb.ap.regs[bps[1].comp_register_addr] == 0
+        # The freed comparator is reused.
+        bp = fpb.set_breakpoint(0x600)
+        assert bp is bps[1]
+        assert bp.addr == 0x600
+
+    def test_remove_unknown(self, fpb):
+        fpb.set_breakpoint(0x100)
+        bp = fpb.set_breakpoint(0x200)
+        fpb.remove_breakpoint(bp)
+        fpb.remove_breakpoint(bp)
+        assert fpb.available_breakpoints == 3
+
+    def test_enable_once(self, fpb):
+        count = fpb.ap.write_count
+        fpb.enable()
+        fpb.enable()
+        assert fpb.ap.write_count == count + 1
+        fpb.enable(force=True)
+        assert fpb.ap.write_count == count + 2
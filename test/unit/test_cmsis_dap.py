@@ -0,0 +1,67 @@
+# pyOCD debugger
+# Copyright (c) 2020 Arm Limited
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from pyocd.probe.pydapaccess.dap_access_cmsis_dap import DAPAccessCMSISDAP
+from pyocd.probe.pydapaccess.cmsis_dap_core import Command
+
+class MockInterface(object):
+    """! @brief CMSIS-DAP interface that records written packets and acks every transfer."""
+    def __init__(self):
+        self.written = []
+        self._responses = []
+
+    def get_packet_count(self):
+        return 1
+
+    def write(self, data):
+        data = bytearray(data)
+        self.written.append(data)
+        if data[0] == Command.DAP_TRANSFER_BLOCK:
+            self._responses.append(bytearray([Command.DAP_TRANSFER_BLOCK, data[2], data[3], 1]))
+        else:
+            self._responses.append(bytearray([Command.DAP_TRANSFER, data[2], 1]))
+
+    def read(self):
+        return self._responses.pop(0)
+
+@pytest.fixture(scope='function')
+def link():
+    link = DAPAccessCMSISDAP.__new__(DAPAccessCMSISDAP)
+    link._packet_size = 64
+    link._interface = MockInterface()
+    link._deferred_transfer = True
+    link._init_deferred_buffers()
+    return link
+
+class TestNegativeWrites(object):
+    def test_write_reg(self, link):
+        link.write_reg(DAPAccessCMSISDAP.REG.AP_0xC, -1)
+        link.write_reg(DAPAccessCMSISDAP.REG.AP_0xC, 0xffffffff)
+        link.write_reg(DAPAccessCMSISDAP.REG.AP_0x4, 0x12345678)
+        link.flush()
+        packet = link._interface.written[0]
+        assert packet[0] == Command.DAP_TRANSFER
+        assert packet[3:8] == packet[8:13]
+        assert packet[4:8] == b'\xff\xff\xff\xff'
+
+    def test_reg_write_repeat(self, link):
+        link.reg_write_repeat(2, DAPAccessCMSISDAP.REG.AP_0xC, [-1, -2])
+        link.flush()
+        packet = link._interface.written[0]
+        assert packet[0] == Command.DAP_TRANSFER_BLOCK
+        assert packet[5:13] == b'\xff\xff\xff\xff\xfe\xff\xff\xff'
@@ -43,6 +43,7 @@ from pyocd.utility.mask import (
 )
 from pyocd.gdbserver.gdbserver import (
     escape,
+    strip_checksum,
     unescape,
 )
 
@@ -106,6 +107,24 @@ class TestConversionUtilities(object):
             0xCDAB,
         ]
 
+    def test_u16leRoundTrip(self):
+        data = list(range(256))
+        assert u16le_list_to_byte_list(byte_list_to_u16le_list(data)) == data
+        assert byte_list_to_u16le_list(bytearray(data))[:2] == [0x0100, 0x0302]
+        assert u16le_list_to_byte_list([]) == []
+
+    @pytest.mark.parametrize("count", [1, 31, 32, 100])
+    def test_u16leShortAndLong(self, count):
+        halfwords = [(i * 0x0123) & 0xffff for i in range(count)]
+        data = u16le_list_to_byte_list(halfwords)
+        assert data == [b for h in halfwords for b in (h & 0xff, h >> 8)]
+        assert byte_list_to_u16le_list(data) == halfwords
+
+    @pytest.mark.parametrize("length", [1, 3, 65])
+    def test_byteListToU16leOddLength(self, length):
+        with pytest.raises(ValueError):
+            byte_list_to_u16le_list([0] * length)
+
     def test_u32BEToFloat32BE(self):
         assert u32_to_float32(0x012345678) == 5.690456613903524e-28
 
@@ -190,12 +209,17 @@ class TestGdbEscape(object):
     
     def test_escape_2(self):
         assert escape(b'1234#09*xyz') == b'1234}\x0309}\x0axyz'
+
+    def test_escape_memoryview(self):
+        data = memoryview(b'abc#def')
+        assert escape(data[:3]) == b'abc'
+        assert escape(data[2:5]) == b'c}\x03d'
     
     # Verify all chars that shouldn't be escaped pass through unmodified.
     @pytest.mark.parametrize("data",
         [six.int2byte(x) for x in range(256) if (x not in ESCAPEES)])
     def test_unescape_passthrough(self, data):
-        assert unescape(data) == [six.byte2int(data)]
+        assert unescape(data) == bytearray(data)
     
     @pytest.mark.parametrize(("expected", "data"), [
             (0x23, b'}\x03'),
@@ -204,11 +228,20 @@ class TestGdbEscape(object):
             (0x2a, b'}\x0a')
         ])
     def test_unescape_1(self, data, expected):
-        assert unescape(data) == [expected]
+        assert unescape(data) == bytearray([expected])
     
     def test_unescape_2(self):
         assert unescape(b'1234}\x0309}\x0axyz') == \
-            [0x31, 0x32, 0x33, 0x34, 0x23, 0x30, 0x39, 0x2a, 0x78, 0x79, 0x7a]
+            bytearray([0x31, 0x32, 0x33, 0x34, 0x23, 0x30, 0x39, 0x2a, 0x78, 0x79, 0x7a])
+
+    @pytest.mark.parametrize(("data", "expected"), [
+            (b"m0,4#fd", b"m0,4"),
+            (b"m0,4", b"m0,4"),
+            (b"#00", b""),
+            (b"", b""),
+        ])
+    def test_strip_checksum(self, data, expected):
+        assert strip_checksum(data) == expected
 
 class TestPairwise(object):
     def test_empty(self):
@@ -0,0 +1,82 @@
+# pyOCD debugger
+# Copyright (c) 2020 Arm Limited
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import random
+from intervaltree import IntervalTree
+
+from pyocd.debug.elf.decoder import AddressRangeIndex
+
+class TestAddressRangeIndex:
+    def test_empty(self):
+        index = AddressRangeIndex()
+        assert len(index) == 0
+        assert index.get(0) is None
+        assert index.get(0x1000) is None
+
+    def test_disjoint(self):
+        index = AddressRangeIndex([(0x100, 0x110, 'b'), (0x0, 0x10, 'a'), (0x200, 0x201, 'c')])
+        assert index.get(0x0) == 'a'
+        assert index.get(0xf) == 'a'
+        assert index.get(0x10) is None
+        assert index.get(0x10f) == 'b'
+        assert index.get(0x200) == 'c'
+        assert index.get(0x201) is None
+        assert index.get(0xffffffff) is None
+
+    def test_repeated_lookup(self):
+        index = AddressRangeIndex([(0x0, 0x10, 'a'), (0x20, 0x30, 'b')])
+        assert index.get(0x4) == 'a'
+        assert index.get(0x8) == 'a'
+        assert index.get(0x18) is None
+        assert index.get(0xc) == 'a'
+        assert index.get(0x20) == 'b'
+        assert index.get(0x0) == 'a'
+
+    def test_nested(self):
+        index = AddressRangeIndex([(0x0, 0x100, 'outer'), (0x10, 0x20, 'inner')])
+        # The range with the lowest start wins.
+        assert index.get(0x15) == 'outer'
+        assert index.get(0x50) == 'outer'
+        assert len(index) == 1
+
+    def test_same_start(self):
+        index = AddressRangeIndex([(0x0, 0x100, 'long'), (0x0, 0x10, 'short')])
+        assert index.get(0x8) == 'short'
+        assert index.get(0x10) == 'long'
+
+    def test_identical_ranges(self):
+        # Ties resolve by input order, not by comparing the data.
+        index = AddressRangeIndex([(0x0, 0x10, 'z'), (0x0, 0x10, 'a')])
+        assert index.get(0x8) == 'z'
+
+    def test_empty_range_ignored(self):
+        index = AddressRangeIndex([(0x10, 0x10, 'empty'), (0x20, 0x10, 'backwards')])
+        assert len(index) == 0
+        assert index.get(0x10) is None
+
+    def test_matches_interval_tree(self):
+        rng = random.Random(1234)
+        ranges = []
+        for i in range(200):
+            start = rng.randrange(0, 0x1000)
+            ranges.append((start, start + rng.randrange(1, 0x80), i))
+        index = AddressRangeIndex(ranges)
+        tree = IntervalTree.from_tuples(ranges)
+        for addr in range(0, 0x1100):
+            matches = sorted(tree[addr])
+            expected = matches[0].data if matches else None
+            assert index.get(addr) == expected
@@ -0,0 +1,94 @@
+# pyOCD debugger
+# Copyright (c) 2020 Arm Limited
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from pyocd.gdbserver.gdbserver import GDBServer
+from pyocd.gdbserver.packet_io import checksum
+
+class MockFacade(object):
+    """! @brief Debug context facade that returns a new register value for every read."""
+    def __init__(self):
+        self.reads = 0
+
+    def get_register_context(self):
+        self.reads += 1
+        return b"%08x" % self.reads
+
+    def set_register(self, reg, value):
+        pass
+
+    def get_memory_map_xml(self):
+        return None
+
+@pytest.fixture(scope='function')
+def server():
+    # Only the state used by the handlers under test is set up.
+    server = GDBServer.__new__(GDBServer)
+    server.target_facade = MockFacade()
+    server.is_target_running = False
+    server._register_cache = None
+    server.COMMANDS = {
+            b'g' : (server.get_registers, 0),
+            b'P' : (server.write_register, 2),
+            b'q' : (server.handle_query, 2),
+        }
+    server.QUERY_COMMANDS = {
+            b'Supported' : server.query_supported,
+        }
+    server.packet_size = 2048
+    server.gdb_features = []
+    server.DETACH_COMMANDS = ()
+    server.REGISTER_CACHE_COMMANDS = (b'g', b'm', b'p')
+    return server
+
+class TestRegisterCache(object):
+    def test_halted(self, server):
+        first, _ = server.handle_message(b"$g#67")
+        assert server.handle_message(b"$g#67")[0] == first
+        assert server.target_facade.reads == 1
+
+    def test_dropped_by_other_command(self, server):
+        first, _ = server.handle_message(b"$g#67")
+        server.handle_message(b"$P1=00000000#00")
+        assert server.handle_message(b"$g#67")[0] != first
+        assert server.target_facade.reads == 2
+
+    def test_running(self, server):
+        server.is_target_running = True
+        first, _ = server.handle_message(b"$g#67")
+        assert server.handle_message(b"$g#67")[0] != first
+        assert server._register_cache is None
+
+        # The target halts without a packet being received; the next 'g' must read again.
+        server.is_target_running = False
+        assert server.handle_message(b"$g#67")[0] == server.create_rsp_packet(b"00000003")
+        assert server.target_facade.reads == 3
+
+class TestQuerySupported(object):
+    FEATURES = b"qXfer:features:read+;QStartNoAckMode+;qXfer:threads:read+;QNonStop+;PacketSize=800"
+
+    def check_reply(self, reply):
+        assert reply == (b"$" + self.FEATURES + b"#" + checksum(self.FEATURES), 0)
+
+    def test_with_features(self, server):
+        packet = b"qSupported:multiprocess+;swbreak+"
+        self.check_reply(server.handle_message(b"$" + packet + b"#" + checksum(packet)))
+        assert server.gdb_features[0] == b"multiprocess+"
+
+    def test_without_features(self, server):
+        self.check_reply(server.handle_message(b"$qSupported#" + checksum(b"qSupported")))
+        assert server.gdb_features == []
@@ -344,6 +344,15 @@ class TestMemoryMap:
         assert memmap.get_region_for_address(0x20000000).name == 'ram'
         assert memmap.get_region_for_address(0x20000500).name == 'ram2'
 
+    def test_rgn_for_addr_cache(self, memmap, flash):
+        assert memmap.get_region_for_address(0x40000000) is None
+        assert memmap.get_region_for_address(0) is flash
+        newrgn = RamRegion(start=0x40000000, length=0x100, name='newram')
+        memmap.add_region(newrgn)
+        assert memmap.get_region_for_address(0x40000000) is newrgn
+        memmap.remove_region(flash)
+        assert memmap.get_region_for_address(0) is None
+
     def test_valid(self, memmap):
         assert memmap.is_valid_address(0)
         assert memmap.is_valid_address(0x200)
@@ -0,0 +1,170 @@
+# pyOCD debugger
+# Copyright (c) 2020 Arm Limited
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import socket
+import time
+
+from pyocd.gdbserver import packet_io
+from pyocd.gdbserver.packet_io import (
+    checksum,
+    GDBServerPacketIOThread,
+    RECEIVE_QUEUE_SIZE,
+    )
+
+class MockSocket(object):
+    """! @brief Socket that returns the given chunks from read_into() and then closes.
+
+    A None chunk makes read_into() time out. Unless readable is False, select() always reports the
+    socket as readable.
+    """
+    def __init__(self, chunks, max_write=None, readable=True):
+        self.port = 0
+        self._chunks = list(chunks)
+        self._max_write = max_write
+        self.written = []
+        self._select_socket, self._select_peer = socket.socketpair()
+        if readable:
+            self._select_peer.send(b'\0')
+
+    def set_timeout(self, timeout):
+        pass
+
+    def fileno(self):
+        return self._select_socket.fileno()
+
+    def read_into(self, buffer):
+        if self._chunks:
+            chunk = self._chunks.pop(0)
+            if chunk is None:
+                raise socket.timeout()
+            buffer[:len(chunk)] = chunk
+            return len(chunk)
+        return 0
+
+    def write(self, data):
+        data = bytes(data[:self._max_write])
+        self.written.append(data)
+        return len(data)
+
+def run_packet_thread(chunks):
+    sock = MockSocket(chunks)
+    thread = GDBServerPacketIOThread(sock)
+    thread.join(5.0)
+    # The connection is closed by now, so drain the queue directly instead of via receive().
+    packets = []
+    while not thread._receive_queue.empty():
+        packets.append(thread._receive_queue.get())
+    return thread, sock, packets
+
+class TestChecksum:
+    @pytest.mark.parametrize(("data", "expected"), [
+            (b"", b"00"),
+            (b"OK", b"9a"),
+            (b"qSupported", b"37"),
+            (b"\xff\xff", b"fe"),
+            (bytearray(b"m0,4"), b"fd"),
+            (memoryview(b"$m0,4#fd")[1:-3], b"fd"),
+        ])
+    def test_checksum(self, data, expected):
+        assert checksum(data) == expected
+
+    @pytest.mark.parametrize("length", [255, 511, 512, 4096])
+    def test_checksum_large(self, length, monkeypatch):
+        # Force the pure Python path even if numpy is installed.
+        monkeypatch.setattr(packet_io, "_numpy", False)
+        data = bytes(bytearray(i & 0xff for i in range(length)))
+        assert checksum(data) == ("%02x" % (sum(bytearray(data)) & 0xff)).encode()
+
+    @pytest.mark.parametrize("length", [511, 512, 4096])
+    def test_checksum_large_numpy(self, length, monkeypatch):
+        monkeypatch.setattr(packet_io, "_numpy", pytest.importorskip("numpy"))
+        data = bytes(bytearray(i & 0xff for i in range(length)))
+        assert checksum(data) == ("%02x" % (sum(bytearray(data)) & 0xff)).encode()
+
+    def test_checksum_numpy_accumulator_wraps(self, monkeypatch):
+        monkeypatch.setattr(packet_io, "_numpy", pytest.importorskip("numpy"))
+        # The sum of 2**25 + 3 0xff bytes overflows 32 bits; its low byte is (3 * 0xff) & 0xff.
+        data = b"\xff" * (2**25 + 3)
+        assert checksum(data) == b"fd"
+
+class TestPacketIOThread:
+    def test_split_packets(self):
+        thread, sock, packets = run_packet_thread([b"$m0,", b"4#fd$O", b"K#9a"])
+        assert packets == [b"$m0,4#fd", b"$OK#9a"]
+        assert all(type(p) is bytes for p in packets)
+        assert sock.written == [b"+", b"+"]
+
+    def test_bad_checksum(self):
+        thread, sock, packets = run_packet_thread([b"$OK#00$OK#9a"])
+        assert packets == [b"$OK#9a"]
+        assert sock.written == [b"-", b"+"]
+
+    def test_uppercase_checksum(self):
+        thread, sock, packets = run_packet_thread([b"$m0,4#FD"])
+        assert packets == [b"$m0,4#FD"]
+        assert sock.written == [b"+"]
+
+    def test_ctrl_c(self):
+        thread, sock, packets = run_packet_thread([b"\x03$OK#9a"])
+        assert thread.interrupt_event.is_set()
+        assert packets == [b"$OK#9a"]
+
+    def test_partial_writes(self):
+        sock = MockSocket([], max_write=3)
+        thread = GDBServerPacketIOThread(sock)
+        thread.join(5.0)
+        thread._write_packet(b"$m0,4#fd")
+        assert sock.written == [b"$m0", b",4#", b"fd"]
+
+    def test_bounded_queue(self):
+        count = RECEIVE_QUEUE_SIZE * 2
+        sock = MockSocket([b"$OK#9a" * count])
+        thread = GDBServerPacketIOThread(sock)
+        packets = [thread._receive_queue.get(True, 5.0) for _ in range(count)]
+        thread.join(5.0)
+        assert packets == [b"$OK#9a"] * count
+        assert sock.written == [b"+"] * count
+
+    def test_stop_with_full_queue(self):
+        sock = MockSocket([b"$OK#9a" * (RECEIVE_QUEUE_SIZE + 1)])
+        thread = GDBServerPacketIOThread(sock)
+        while not thread._receive_queue.full():
+            time.sleep(0.01)
+        thread.stop()
+        thread.join(5.0)
+        assert not thread.is_alive()
+
+    def test_timeout(self):
+        thread, sock, packets = run_packet_thread([None, b"$OK#9a", None])
+        assert packets == [b"$OK#9a"]
+
+    def test_stop_idle(self):
+        sock = MockSocket([], readable=False)
+        thread = GDBServerPacketIOThread(sock)
+        time.sleep(0.05)
+        assert thread.is_alive()
+        thread.stop()
+        thread.join(1.0)
+        assert not thread.is_alive()
+
+    def test_receive_timeout(self):
+        sock = MockSocket([], readable=False)
+        thread = GDBServerPacketIOThread(sock)
+        assert thread.receive(timeout=0.05) is None
+        assert thread.receive(block=False) is None
+        thread.stop()
+        thread.join(1.0)
@@ -0,0 +1,41 @@
+# pyOCD debugger
+# Copyright (c) 2020 Arm Limited
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import six
+
+from pyocd.utility.progress import ProgressReportTTY
+
+def run_tty_report(steps):
+    out = six.StringIO()
+    report = ProgressReportTTY(out)
+    for progress in steps:
+        report(progress)
+    # Each redraw starts with a carriage return.
+    return out.getvalue().rstrip("\n").split("\r")[1:]
+
+class TestProgressReportTTY(object):
+    def test_final_bar(self):
+        frames = run_tty_report([0.0, 0.5, 0.996, 1.0])
+        assert frames[-1] == "[" + "=" * 20 + "] 100%"
+
+    def test_bar_change_with_same_percent(self):
+        frames = run_tty_report([0.0, 0.0496, 0.05])
+        assert frames[-1] == "[=                   ]   5%"
+
+    def test_unchanged_redraw_skipped(self):
+        frames = run_tty_report([0.0, 0.001, 0.002, 1.0])
+        assert frames == ["[                    ]   0%", "[" + "=" * 20 + "] 100%"]
@@ -310,6 +310,25 @@ class TestRomTable:
         assert tpiu.component_class == 9
         assert tpiu.part == 0x9a1
         assert tpiu.devid == [0xca1, 0, 0]
+    
+    # Test a ROM table with more entries than are read in a single block.
+    def test_long_rom(self):
+        base = MockM4Components.M4_ROM_TABLE_BASE
+        long_rom_table = MockCoreSightComponent(base, cidr=0xb105100d, pidr=0x4000bb4c4,
+            extra={
+                # Twelve non-present entries, followed by the SCS.
+                base: ([0x00001002] * 12) + [0xfff0f003] + ([0x00000000] * 8),
+            })
+        rom = MockCoreSight([long_rom_table, MockM4Components.SCS])
         
-
-
+        # Read ROM table component ID.
+        cmpid = CoreSightComponentID(None, rom, base)
+        cmpid.read_id_registers()
+        
+        # Create the ROM table.
+        rom_table = ROMTable.create(rom, cmpid)
+        rom_table.init()
+        
+        # Verify only the SCS entry was found.
+        assert len(rom_table.components) == 1
+        assert rom_table.components[0].address == MockM4Components.SCS_BASE
@@ -0,0 +1,101 @@
+# pyOCD debugger
+# Copyright (c) 2020 Arm Limited
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+import six
+
+from pyocd.trace.swo import SWOParser
+from pyocd.trace.swv import SWVEventSink
+from pyocd.trace import events
+
+class MockCore(object):
+    def exception_number_to_name(self, exc_num, name_thread=False):
+        return "exc%d" % exc_num
+
+class RecordingSink(object):
+    def __init__(self):
+        self.events = []
+
+    def receive(self, event):
+        self.events.append(event)
+
+@pytest.fixture(scope='function')
+def sink():
+    return RecordingSink()
+
+@pytest.fixture(scope='function')
+def parser(sink):
+    return SWOParser(MockCore(), sink)
+
+# Sync, then ITM port 1 byte, ITM port 2 halfword, ITM port 3 word, then a local timestamp
+# (format 1, TS=0x81) that flushes the pending events.
+ITM_STREAM = bytearray([0, 0, 0, 0, 0, 0x80,
+                        0x09, 0x41,
+                        0x12, 0x34, 0x12,
+                        0x1b, 0x78, 0x56, 0x34, 0x12,
+                        0xc0, 0x81, 0x01])
+
+class TestSWOParser:
+    def test_itm(self, parser, sink):
+        parser.parse(ITM_STREAM)
+        assert parser.bytes_parsed == len(ITM_STREAM)
+        assert len(sink.events) == 3
+        assert [(e.port, e.data, e.width) for e in sink.events] == [
+                (1, 0x41, 1),
+                (2, 0x1234, 2),
+                (3, 0x12345678, 4),
+                ]
+        assert all(e.timestamp == 0x81 for e in sink.events)
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7])
+    def test_chunked(self, parser, sink, chunk_size):
+        for offset in range(0, len(ITM_STREAM), chunk_size):
+            parser.parse(ITM_STREAM[offset:offset + chunk_size])
+        assert parser.bytes_parsed == len(ITM_STREAM)
+        assert [(e.port, e.data, e.width) for e in sink.events] == [
+                (1, 0x41, 1),
+                (2, 0x1234, 2),
+                (3, 0x12345678, 4),
+                ]
+
+    def test_itm_page(self, parser, sink):
+        # Extension packet setting stimulus page 1, then ITM port 1 and an overflow.
+        parser.parse([0x18, 0x09, 0xaa, 0x70])
+        assert len(sink.events) == 2
+        assert sink.events[0].port == 33
+        assert isinstance(sink.events[1], events.TraceOverflow)
+
+    def test_hardware(self, parser, sink):
+        # Exception trace (exception 15 entered), periodic PC, then overflow to flush.
+        parser.parse([0x0e, 0x0f, 0x10, 0x17, 0x00, 0x01, 0x00, 0x08, 0x70])
+        assert isinstance(sink.events[0], events.TraceExceptionEvent)
+        assert sink.events[0].exception_number == 15
+        assert sink.events[0].exception_name == "exc15"
+        assert isinstance(sink.events[1], events.TracePeriodicPC)
+        assert sink.events[1].pc == 0x08000100
+        assert isinstance(sink.events[2], events.TraceOverflow)
+
+class TestSWVEventSink:
+    def test_text(self):
+        console = six.StringIO()
+        sink = SWVEventSink(console)
+        sink.receive(events.TraceITMEvent(0, 0x41, 1))
+        sink.receive(events.TraceITMEvent(0, 0x4342, 2))
+        sink.receive(events.TraceITMEvent(0, 0x0a474645, 4))
+        # Events for other ports are ignored.
+        sink.receive(events.TraceITMEvent(1, 0x5a, 1))
+        assert console.getvalue() == "ABCEFG\n"